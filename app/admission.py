@@ -0,0 +1,135 @@
+from __future__ import annotations
+import contextvars
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from app.settings import get_settings
+
+# Admission control for the decision routes. The middleware counts in-flight
+# requests and stamps each one with its arrival time. Past the soft limits (too
+# many in flight on arrival, or it sat in the threadpool queue too long) the
+# handler serves a degraded Decision: cached or heuristic signals, no text model,
+# no exploration. Past the hard limit the request is shed with 503 + Retry-After.
+# Debounced turns inside their settle window are idle: they don't count toward
+# the soft limit and the window is not queue wait.
+
+GUARDED_PATHS = frozenset({"/decide", "/auto_decide", "/suggest"})
+
+
+class Ticket:
+    __slots__ = ("arrived", "in_flight_on_arrival", "settled_s", "_reason", "_checked")
+
+    def __init__(self, in_flight: int):
+        self.arrived = time.perf_counter()
+        self.in_flight_on_arrival = in_flight
+        self.settled_s = 0.0
+        self._reason: Optional[Dict[str, Any]] = None
+        self._checked = False
+
+
+class Admission:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.settling = 0
+        self.admitted = 0
+        self.degraded = 0
+        self.rejected = 0
+
+    def enter(self) -> Optional[Ticket]:
+        """A ticket for a new request, or None if it must be shed."""
+        hard = get_settings().admission_hard_inflight
+        with self._lock:
+            if hard and self.in_flight >= hard:
+                self.rejected += 1
+                return None
+            self.in_flight += 1
+            self.admitted += 1
+            return Ticket(self.in_flight - self.settling)
+
+    def leave(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def _settle(self, delta: int) -> None:
+        with self._lock:
+            self.settling += delta
+
+    def _count_degraded(self) -> None:
+        with self._lock:
+            self.degraded += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"in_flight": self.in_flight, "settling": self.settling, "admitted": self.admitted,
+                    "degraded": self.degraded, "rejected": self.rejected}
+
+
+ADMISSION = Admission()
+_ticket: contextvars.ContextVar[Optional[Ticket]] = contextvars.ContextVar("brain_ticket", default=None)
+
+def degraded() -> Optional[Dict[str, Any]]:
+    """
+    Why the current request runs degraded, or None. Call it once at handler entry,
+    before any pipeline work: the first call decides for the whole request, and
+    queue wait is measured up to that point minus any settle window.
+    """
+    t = _ticket.get()
+    if t is None:
+        return None
+    if not t._checked:
+        t._checked = True
+        cfg = get_settings()
+        wait_ms = (time.perf_counter() - t.arrived - t.settled_s) * 1000.0
+        if cfg.admission_soft_inflight and t.in_flight_on_arrival > cfg.admission_soft_inflight:
+            t._reason = {"in_flight": t.in_flight_on_arrival, "limit": cfg.admission_soft_inflight}
+        elif cfg.admission_max_wait_ms and wait_ms > cfg.admission_max_wait_ms:
+            t._reason = {"queue_wait_ms": round(wait_ms, 1), "limit": cfg.admission_max_wait_ms}
+        if t._reason is not None:
+            ADMISSION._count_degraded()
+    return t._reason
+
+@contextmanager
+def settling() -> Iterator[None]:
+    """Mark the current request idle (a debounce settle window) for the soft limits."""
+    t = _ticket.get()
+    if t is None:
+        yield
+        return
+    ADMISSION._settle(1)
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        t.settled_s += time.perf_counter() - t0
+        ADMISSION._settle(-1)
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware; only the decision routes are counted."""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in GUARDED_PATHS:
+            await self.app(scope, receive, send)
+            return
+        ticket = ADMISSION.enter()
+        if ticket is None:
+            body = json.dumps({"detail": "overloaded, retry later"}).encode("utf-8")
+            await send({"type": "http.response.start", "status": 503, "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(get_settings().admission_retry_after_s).encode()),
+            ]})
+            await send({"type": "http.response.body", "body": body})
+            return
+        token = _ticket.set(ticket)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _ticket.reset(token)
+            ADMISSION.leave()
@@ -0,0 +1,174 @@
+"""
+Offline bulk decisions for JSONL thread dumps.
+
+Each input line is either an AutoIn record (``messages.fan_last`` ...) or a legacy
+SuggestRequest (``messages`` is a flat list). Records are decided with the very
+same pipeline the HTTP routes use, chunked across a process pool, and written to
+the output JSONL in input order as ``{"line": n, "decision": {...}}`` (or
+``{"line": n, "error": "..."}``).
+
+Run:
+  python -m app.batch threads.jsonl -o decisions.jsonl --workers 8
+  python -m app.batch threads.jsonl -o decisions.jsonl --resume   # continue after a crash
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+Chunk = List[Tuple[int, str]]
+
+
+def decide_record(rec: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Same pipeline and same JSON as the HTTP routes:
+    legacy SuggestRequest -> /suggest body, AutoIn -> /auto_decide body.
+    """
+    from app.main import AutoIn, _auto_decide, _suggest_auto, _suggest_response
+
+    if isinstance(rec.get("messages"), list):
+        return _suggest_response(_auto_decide(_suggest_auto(rec)))
+    return _auto_decide(AutoIn.model_validate(rec)).model_dump(mode="json")
+
+
+def _decide_chunk(chunk: Chunk) -> Tuple[List[str], int]:
+    out: List[str] = []
+    errors = 0
+    for lineno, raw in chunk:
+        row: Dict[str, Any] = {"line": lineno}
+        try:
+            rec = json.loads(raw)
+            if isinstance(rec, dict) and rec.get("id") is not None:
+                row["id"] = rec["id"]
+            row["decision"] = decide_record(rec)
+        except Exception as e:
+            row["error"] = f"{type(e).__name__}: {e}"
+            errors += 1
+        out.append(json.dumps(row, ensure_ascii=False))
+    return out, errors
+
+
+def _worker_init() -> None:
+    # import the app (pydantic models, regexes) once per worker, not per chunk
+    import app.main  # noqa: F401
+
+
+def _read_chunks(path: Path, start_line: int, chunk_size: int) -> Iterator[Chunk]:
+    with path.open("r", encoding="utf-8") as fh:
+        numbered = ((i, ln) for i, ln in enumerate(fh) if i >= start_line and ln.strip())
+        while True:
+            chunk = list(islice(numbered, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+
+# ---- checkpoint: {"next_line": n, "out_bytes": b} ----
+def _load_checkpoint(path: Path) -> Dict[str, int]:
+    if not path.exists():
+        return {"next_line": 0, "out_bytes": 0}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+def _save_checkpoint(path: Path, next_line: int, out_bytes: int) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps({"next_line": next_line, "out_bytes": out_bytes}), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class ResumeError(RuntimeError):
+    """The checkpoint and the output file disagree; resuming would corrupt the output."""
+
+
+def run(inp: Path, out: Path, workers: int, chunk_size: int, resume: bool,
+        checkpoint: Optional[Path] = None) -> Dict[str, Any]:
+    ckpt_path = checkpoint or out.with_name(out.name + ".ckpt")
+    state = _load_checkpoint(ckpt_path) if resume else {"next_line": 0, "out_bytes": 0}
+
+    if state["out_bytes"]:
+        # the checkpoint vouches for out_bytes of output; without them, resuming
+        # would pad the file with NULs instead of the decisions it claims
+        have = out.stat().st_size if out.exists() else None
+        if have is None or have < state["out_bytes"]:
+            raise ResumeError(f"checkpoint {ckpt_path} expects {state['out_bytes']} bytes of {out}, "
+                              f"found {'no file' if have is None else f'{have} bytes'}; "
+                              "restore the output or rerun without --resume")
+
+    # drop any partial tail written after the last checkpoint
+    fh = out.open("r+b" if (resume and out.exists()) else "wb")
+    fh.truncate(state["out_bytes"])
+    fh.seek(state["out_bytes"])
+
+    done = errors = 0
+    t0 = time.perf_counter()
+
+    def _flush(result: Tuple[List[str], int], last_line: int) -> None:
+        nonlocal done, errors
+        lines, n_err = result
+        fh.write("".join(s + "\n" for s in lines).encode("utf-8"))
+        fh.flush()
+        done += len(lines)
+        errors += n_err
+        _save_checkpoint(ckpt_path, last_line + 1, fh.tell())
+
+    chunks = _read_chunks(inp, state["next_line"], chunk_size)
+    try:
+        if workers <= 1:
+            _worker_init()
+            for chunk in chunks:
+                _flush(_decide_chunk(chunk), chunk[-1][0])
+        else:
+            # bounded window of in-flight chunks keeps memory flat; results are
+            # written strictly in submission (= input) order
+            window = workers * 2
+            pending: List[Tuple[int, Future]] = []
+            with ProcessPoolExecutor(max_workers=workers, initializer=_worker_init) as pool:
+                for chunk in chunks:
+                    pending.append((chunk[-1][0], pool.submit(_decide_chunk, chunk)))
+                    while len(pending) >= window:
+                        last, fut = pending.pop(0)
+                        _flush(fut.result(), last)
+                for last, fut in pending:
+                    _flush(fut.result(), last)
+    finally:
+        fh.close()
+
+    elapsed = time.perf_counter() - t0
+    return {
+        "records": done,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "records_per_s": round(done / elapsed, 1) if elapsed > 0 else None,
+        "workers": max(1, workers),
+        "chunk_size": chunk_size,
+        "resumed_from_line": state["next_line"],
+        "output": str(out),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m app.batch", description="Bulk brain decisions over a JSONL dump.")
+    ap.add_argument("input", type=Path, help="JSONL of AutoIn or legacy SuggestRequest records")
+    ap.add_argument("-o", "--output", type=Path, required=True, help="decisions JSONL (input order)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="process pool size (1 = inline)")
+    ap.add_argument("--chunk-size", type=int, default=256, help="records per task")
+    ap.add_argument("--resume", action="store_true", help="continue from the checkpoint next to the output")
+    ap.add_argument("--checkpoint", type=Path, default=None, help="checkpoint path (default: <output>.ckpt)")
+    args = ap.parse_args(argv)
+
+    try:
+        summary = run(args.input, args.output, args.workers, max(1, args.chunk_size), args.resume, args.checkpoint)
+    except ResumeError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    print(json.dumps(summary), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
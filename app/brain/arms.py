@@ -0,0 +1,69 @@
+from __future__ import annotations
+import zlib
+from multiprocessing import resource_tracker, shared_memory
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.settings import get_settings
+
+# Bandit arm statistics shared by every uvicorn worker on the host.
+# Arms are (mission, candidate family, tier) hashed into a fixed slot table of
+# uint32 [successes, failures] living in POSIX shared memory. Updates are plain
+# lock-free increments: a rare lost update under contention only nudges a Beta
+# posterior, which is cheaper than any cross-process lock.
+
+class ArmStats:
+    def __init__(self, name: Optional[str], slots: int = 4096):
+        self.slots = slots
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        nbytes = slots * 2 * np.dtype(np.uint32).itemsize
+        if name:
+            try:
+                self._shm = shared_memory.SharedMemory(name=name, create=True, size=nbytes)  # zero-filled
+            except FileExistsError:
+                self._shm = shared_memory.SharedMemory(name=name, create=False)
+            # the segment outlives any single worker; don't let the resource
+            # tracker unlink it when the process that created it exits
+            resource_tracker.unregister(self._shm._name, "shared_memory")  # type: ignore[attr-defined]
+            self.counts = np.ndarray((slots, 2), dtype=np.uint32, buffer=self._shm.buf)
+        else:
+            self.counts = np.zeros((slots, 2), dtype=np.uint32)
+
+    @property
+    def shared(self) -> bool:
+        return self._shm is not None
+
+    def slot(self, mission: str, family: str, tier: str) -> int:
+        return zlib.crc32(f"{mission}|{family}|{tier}".encode("utf-8")) % self.slots
+
+    def record(self, mission: str, family: str, tier: str, success: bool) -> Tuple[int, int]:
+        i = self.slot(mission, family, tier)
+        self.counts[i, 0 if success else 1] += 1
+        s, f = self.counts[i]
+        return int(s), int(f)
+
+    def get(self, mission: str, family: str, tier: str) -> Tuple[int, int]:
+        s, f = self.counts[self.slot(mission, family, tier)]
+        return int(s), int(f)
+
+    def sample(self, mission: str, families: Sequence[str], tier: str,
+               rng: np.random.Generator) -> np.ndarray:
+        """One Thompson draw per family from Beta(1 + successes, 1 + failures)."""
+        idx = np.fromiter((self.slot(mission, fam, tier) for fam in families), dtype=np.int64, count=len(families))
+        c = self.counts[idx].astype(np.float64)
+        return rng.beta(1.0 + c[:, 0], 1.0 + c[:, 1])
+
+
+_stats: Optional[ArmStats] = None
+
+def arm_stats() -> ArmStats:
+    global _stats
+    if _stats is None:
+        cfg = get_settings()
+        try:
+            _stats = ArmStats(cfg.arms_shm_name)
+        except OSError:
+            # no /dev/shm (or not permitted): learn per worker instead
+            _stats = ArmStats(None)
+    return _stats
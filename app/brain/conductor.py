@@ -1,30 +1,108 @@
 from __future__ import annotations
-from typing import Any, Dict
-from .contracts import BrainInput
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app import snapshot
+from app.settings import get_settings
+from .contracts import BrainInput, Signals
+
+DEFAULT_MISSIONS_PATH = Path(__file__).resolve().parent / "config" / "missions.json"
 
 class Brief:
     def __init__(self, mission: str, why: Dict[str, Any]):
         self.mission = mission
         self.why = why
 
+class MissionTable:
+    """
+    Signals -> feature vector -> (features x missions) weight matrix -> scores.
+    Everything tunable (features, thresholds, missions, weights) lives in the JSON table.
+    """
+    def __init__(self, spec: Dict[str, Any]):
+        self.feature_specs: Dict[str, Dict[str, Any]] = spec["features"]
+        self.features: List[str] = list(self.feature_specs)
+        self.missions: List[str] = list(spec["missions"])
+        self.reasons: List[str] = [m.get("reason", name) for name, m in spec["missions"].items()]
+        col = {f: i for i, f in enumerate(self.features)}
+        self.weights = np.zeros((len(self.features), len(self.missions)), dtype=np.float64)
+        for j, m in enumerate(spec["missions"].values()):
+            for feat, w in m.get("weights", {}).items():
+                if feat not in col:
+                    raise ValueError(f"mission {self.missions[j]!r} weights unknown feature {feat!r}")
+                self.weights[col[feat], j] = float(w)
+        self.signals_used = sorted({s for f in self.feature_specs.values() for s in _signals_of(f)})
+        unknown = set(self.signals_used) - set(Signals.model_fields)
+        if unknown:
+            raise ValueError(f"mission table reads unknown signals: {sorted(unknown)}")
+
+    # ---- featurize ----
+    def signal_matrix(self, rows: Sequence[Signals]) -> np.ndarray:
+        """[n_threads, n_signals_used] raw signal values (bools as 0/1)."""
+        return np.array([[float(getattr(s, k)) for k in self.signals_used] for s in rows],
+                        dtype=np.float64).reshape(len(rows), len(self.signals_used))
+
+    def feature_matrix(self, sig: np.ndarray) -> np.ndarray:
+        cols = {k: sig[:, i] for i, k in enumerate(self.signals_used)}
+        n = sig.shape[0]
+        return np.stack([_eval(self.feature_specs[f], cols, n) for f in self.features], axis=1)
+
+    # ---- score ----
+    def score_batch(self, rows: Sequence[Signals]) -> np.ndarray:
+        """Scores for a whole batch of threads with one matrix multiply: [n_threads, n_missions]."""
+        if not rows:
+            return np.zeros((0, len(self.missions)))
+        return self.feature_matrix(self.signal_matrix(rows)) @ self.weights
+
+    def pick_batch(self, rows: Sequence[Signals]) -> Tuple[List[str], np.ndarray]:
+        scores = self.score_batch(rows)
+        return [self.missions[j] for j in scores.argmax(axis=1)], scores
+
+def _signals_of(spec: Dict[str, Any]) -> List[str]:
+    if "all" in spec:
+        return [s for part in spec["all"] for s in _signals_of(part)]
+    return [spec["signal"]] if "signal" in spec else []
+
+def _eval(spec: Dict[str, Any], cols: Dict[str, np.ndarray], n: int) -> np.ndarray:
+    if "const" in spec:
+        return np.full(n, float(spec["const"]))
+    if "all" in spec:
+        out = np.ones(n)
+        for part in spec["all"]:
+            out = out * _eval(part, cols, n)
+        return out
+    x = cols[spec["signal"]]
+    if "ge" in spec:
+        return (x >= float(spec["ge"])).astype(np.float64)
+    if "le" in spec:
+        return (x <= float(spec["le"])).astype(np.float64)
+    return x * float(spec.get("scale", 1.0))
+
+@lru_cache(maxsize=4)
+def load_mission_table(path: Optional[str] = None) -> MissionTable:
+    p = Path(path) if path else DEFAULT_MISSIONS_PATH
+    return MissionTable(json.loads(p.read_text(encoding="utf-8")))
+
+@lru_cache(maxsize=2)
+def _snapshot_table(snap) -> MissionTable:
+    return MissionTable(snap.json("config.missions"))
+
+def _table() -> MissionTable:
+    snap = snapshot.current()
+    if snap is not None:
+        return _snapshot_table(snap)
+    return load_mission_table(get_settings().missions_config)
+
 def pick_mission(inp: BrainInput) -> Brief:
+    table = _table()
     s = inp.signals
-    # Default mission
-    mission = "rapport_value_add"
-    reason = {"reason": "baseline rapport", "signals": s.model_dump()}
-
-    if s.price_intent >= 0.5:
-        mission = "ppv_pitch"
-        reason = {"reason": "high price intent", "signals": s.model_dump()}
-    elif s.interruption and s.reply_urgency >= 0.55:
-        # fan is actively pinging; keep it light/teasy to maintain flow
-        mission = "soft_tease"
-        reason = {"reason": "fan burst + pinging", "signals": s.model_dump()}
-    elif s.question_density >= 0.5:
-        mission = "discovery_basic"
-        reason = {"reason": "lots of questions", "signals": s.model_dump()}
-    elif s.sentiment_score <= -0.3:
-        mission = "aftercare_checkin"
-        reason = {"reason": "cool/negative vibe", "signals": s.model_dump()}
-
-    return Brief(mission, reason)
+    scores = table.score_batch([s])[0]
+    j = int(scores.argmax())
+    return Brief(table.missions[j], {
+        "reason": table.reasons[j],
+        "signals": s.model_dump(),
+        "scores": {m: round(float(v), 4) for m, v in zip(table.missions, scores)},
+    })
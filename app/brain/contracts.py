@@ -1,6 +1,6 @@
 from __future__ import annotations
 from typing import List, Optional, Literal, Dict, Any
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 # ---- Message DTOs ----
 class MessageLine(BaseModel):
@@ -19,15 +19,25 @@ class Profile(BaseModel):
     tier: Literal["silver","gold","diamond","emerald"] = "silver"
     relationship_age_days: int = 0
 
+# most multiples of price_step a [price_floor, price_ceiling] range may hold
+MAX_PRICE_RUNGS = 100_000
+
 class Budgets(BaseModel):
     max_paid_per_24h_user: float = 5.0
     min_hours_between_paid: float = 0.75
     price_floor: float = 9.0
     price_ceiling: float = 120.0
-    price_step: float = 1.0
+    price_step: float = Field(default=1.0, gt=0)
     exploration_quota: float = 0.2
     compute_tier: Literal["cheap","balanced","premium"] = "balanced"
 
+    @model_validator(mode="after")
+    def _bounded_ladder(self) -> "Budgets":
+        rungs = (self.price_ceiling - self.price_floor) / self.price_step
+        if rungs > MAX_PRICE_RUNGS:
+            raise ValueError(f"price_step too small: {rungs:.0f} price rungs (max {MAX_PRICE_RUNGS})")
+        return self
+
 class Context(BaseModel):
     local_hour: int = 12
     consecutive_no_reply: int = 0
@@ -45,7 +55,8 @@ class Signals(BaseModel):
 
 class CatalogItem(BaseModel):
     ppv_asset_id: str
-    media_type: Literal["photo","video","bundle"]
+    title: str = ""
+    media_type: Literal["photo","video","voice","bundle"]
     tags: List[str] = Field(default_factory=list)
     base_price: float
     description: str
@@ -105,6 +116,14 @@ class Decision(BaseModel):
     budget_used: Dict[str, Any] = Field(default_factory=dict)
     send_now: bool = True
     send_at: Optional[str] = None
+    degraded: bool = False          # served under load shedding (cheap path; see why)
+
+class Outcome(BaseModel):
+    """What the fan did after a Decision was sent; closes the exploration loop."""
+    mission: str
+    chosen_id: str
+    tier: Literal["silver","gold","diamond","emerald"] = "silver"
+    outcome: Literal["replied","bought","ignored"]
 
 class BrainInput(BaseModel):
     messages: Messages
@@ -114,3 +133,17 @@ class BrainInput(BaseModel):
     budgets: Budgets = Field(default_factory=Budgets)
     context: Context = Field(default_factory=Context)
     catalog: Optional[List[CatalogItem]] = None
+
+class AutoIn(BaseModel):
+    """Raw-messages input for /auto_decide; signals are derived server-side."""
+    messages: Messages
+    memory:  Memory  = Memory()
+    profile: Profile = Profile()
+    budgets: Budgets = Budgets()
+    context: Context = Context()
+    catalog: Optional[List[CatalogItem]] = None
+    # Never pitch these assets (e.g. already bought); applies to the default catalog too
+    exclude_ppv: List[str] = Field(default_factory=list)
+    # Debounce: wait this long for a newer request on the same fan_id before deciding
+    # (0 = off; ignored without profile.fan_id)
+    settle_ms: int = Field(default=0, ge=0)
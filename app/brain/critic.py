@@ -1,7 +1,11 @@
 from __future__ import annotations
 from typing import List
+import numpy as np
+from .arms import arm_stats
 from .contracts import BrainInput
 
+_rng = np.random.default_rng()
+
 def _family_of(cid: str) -> str:
     # e.g., "soft_tease_v1" -> "soft_tease"
     if "_v" in cid:
@@ -9,7 +13,7 @@ def _family_of(cid: str) -> str:
     parts = cid.split("_")
     return "_".join(parts[:-1]) if len(parts) > 1 else cid
 
-def choose(inp: BrainInput, brief, cands: List) -> any:
+def choose(inp: BrainInput, brief, cands: List, explore: bool = True) -> any:
     if not cands:
         raise ValueError("no candidates")
     best = None
@@ -27,4 +31,21 @@ def choose(inp: BrainInput, brief, cands: List) -> any:
             pass
         if score > best_score:
             best, best_score = c, score
+
+    # Exploration: within budgets.exploration_quota, Thompson-sample the candidate
+    # families from the shared (mission, family, tier) arm stats instead of argmax.
+    quota = inp.budgets.exploration_quota
+    if explore and len(cands) > 1 and quota > 0 and _rng.random() < quota:
+        draws = arm_stats().sample(brief.mission, [_family_of(c.id) for c in cands], inp.profile.tier, _rng)
+        pick = cands[int(draws.argmax())]
+        brief.why["exploration"] = {
+            "explored": True,
+            "exploit_id": best.id,
+            "draws": {c.id: round(float(d), 4) for c, d in zip(cands, draws)},
+        }
+        return pick
     return best
+
+def record_outcome(mission: str, chosen_id: str, tier: str, success: bool):
+    """Feed a replied/bought (success) or ignored (failure) outcome back into the arm stats."""
+    return arm_stats().record(mission, _family_of(chosen_id), tier, success)
@@ -1,18 +1,185 @@
 from __future__ import annotations
-from typing import List, Dict, Optional
-
-def choose_price(budget: Dict, catalog: Optional[List[Dict]] = None) -> float:
-    floor = float(budget.get("price_floor", 9.0))
-    ceil  = float(budget.get("price_ceiling", 22.0))
-    step  = float(budget.get("price_step", 1.0))
-
-    base = None
-    if catalog:
-        # pick the cheapest viable item by default
-        base = min((float(x.get("base_price", ceil)) for x in catalog), default=None)
-    price = base if base is not None else floor
-    # clamp and align to step
-    price = min(max(price, floor), ceil)
-    # align to step
-    price = round((price/step)) * step
-    return float(price)
+import json
+from decimal import Decimal
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Collection, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app import snapshot
+from app.settings import get_settings
+from .contracts import MAX_PRICE_RUNGS, Budgets, CatalogItem, PPVPlan
+
+DEFAULT_PRICING_PATH = Path(__file__).resolve().parent / "config" / "pricing.json"
+RANKED_TOP = 10  # asset ids listed in why["ranked"]
+
+# caller-provided items, or the shared snapshot's columns (read in place)
+Catalog = Union[Sequence[CatalogItem], snapshot.CatalogColumns]
+
+# One pricing path for every PPV offer: tier-scaled base price snapped onto the
+# (tier, budget) ladder, conversion prior from price_intent + tier, pick the item
+# with the highest expected revenue.
+
+class PricingEngine:
+    def __init__(self, spec: Dict[str, Any]):
+        self.tier_mult: Dict[str, float] = {k: float(v) for k, v in spec["tier_mult"].items()}
+        conv = spec["conversion"]
+        self.bias = float(conv["bias"])
+        self.intent_weight = float(conv["intent_weight"])
+        self.tier_bias: Dict[str, float] = {k: float(v) for k, v in conv["tier_bias"].items()}
+        self.elasticity = float(conv["elasticity"])
+        self.ref_price = float(conv["ref_price"])
+
+    # ---- ladder / quotes ----
+    def ladder(self, budgets: Budgets) -> np.ndarray:
+        """
+        All legal prices for a budget, ascending: multiples of price_step inside
+        [floor, ceiling] plus the bounds themselves. For inspection only (quote()
+        snaps arithmetically); refuses budgets with more than MAX_PRICE_RUNGS rungs.
+        """
+        return _ladder(budgets.price_floor, budgets.price_ceiling, budgets.price_step)
+
+    def quote(self, base_prices: np.ndarray, tier: str, budgets: Budgets) -> np.ndarray:
+        """
+        Tier-scaled base prices snapped to the nearest rung of the ladder (ties go up),
+        computed per price in O(1): the rungs either side of raw are the neighbouring
+        multiples of price_step, or floor / ceiling past the outermost multiples.
+        """
+        raw = np.asarray(base_prices, dtype=np.float64) * self.tier_mult.get(tier, 1.0)
+        floor, ceiling = budgets.price_floor, budgets.price_ceiling
+        if ceiling <= floor:
+            return np.full(raw.shape, floor)
+        step = budgets.price_step
+        lo, hi = _multiples(floor, ceiling, step)
+        if lo > hi:  # no multiple of step inside the bounds
+            down, up = np.full(raw.shape, floor), np.full(raw.shape, ceiling)
+        else:
+            decimals = _decimals(step)
+            k = np.clip(np.floor(raw / step), lo - 1, hi)
+            down = np.where(k < lo, floor, np.round(k * step, decimals))
+            up = np.where(k + 1 > hi, ceiling, np.round((k + 1) * step, decimals))
+        return np.where(raw - down < up - raw, down, up)
+
+    def conversion(self, prices: np.ndarray, price_intent, tier: str) -> np.ndarray:
+        """Conversion prior per price; broadcasts over price_intent arrays for sweeps."""
+        logit = (self.bias
+                 + self.intent_weight * np.asarray(price_intent, dtype=np.float64)
+                 + self.tier_bias.get(tier, 0.0)
+                 - self.elasticity * np.log(np.maximum(prices, 0.01) / self.ref_price))
+        return 1.0 / (1.0 + np.exp(-logit))
+
+    # ---- ranking ----
+    def rank(self, catalog: Catalog, tier: str, budgets: Budgets,
+             price_intent: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(prices, p_convert, expected_revenue) for every catalog item, in catalog order."""
+        prices = self.quote(_base_prices(catalog), tier, budgets)
+        p = self.conversion(prices, price_intent, tier)
+        return prices, p, prices * p
+
+    def choose(self, catalog: Catalog, tier: str, budgets: Budgets,
+               price_intent: float) -> Tuple[Optional[PPVPlan], Dict[str, Any]]:
+        if not len(catalog):
+            return None, {}
+        prices, p, ev = self.rank(catalog, tier, budgets, price_intent)
+        i = int(ev.argmax())  # ties -> earliest catalog item
+        top = np.argsort(-ev, kind="stable")[:RANKED_TOP]
+        if isinstance(catalog, snapshot.CatalogColumns):
+            # decode the chosen row and the listed ids only
+            asset_id, description = catalog.value("ppv_asset_id", i), catalog.value("description", i)
+            ranked = [catalog.value("ppv_asset_id", int(k)) for k in top]
+        else:
+            asset_id, description = catalog[i].ppv_asset_id, catalog[i].description
+            ranked = [catalog[int(k)].ppv_asset_id for k in top]
+        why = {
+            "ppv_asset_id": asset_id,
+            "price": float(prices[i]),
+            "p_convert": round(float(p[i]), 4),
+            "expected_revenue": round(float(ev[i]), 4),
+            "ranked": ranked,
+        }
+        return PPVPlan(ppv_asset_id=asset_id, price=float(prices[i]), description=description), why
+
+    def sweep(self, catalog: Catalog, tiers: Sequence[str], budgets: Budgets,
+              price_intents: Sequence[float]) -> Dict[str, Any]:
+        """
+        Batch what-if over tiers x price_intent for one catalog/budget.
+        Returns expected revenue [n_tiers, n_intents, n_items] plus best item index and price per cell.
+        """
+        base = _base_prices(catalog)
+        intents = np.asarray(price_intents, dtype=np.float64)[:, None]
+        prices = np.stack([self.quote(base, tier, budgets) for tier in tiers])             # [tiers, items]
+        ev = np.stack([prices[t][None, :] * self.conversion(prices[t][None, :], intents, tier)
+                       for t, tier in enumerate(tiers)])                                   # [tiers, intents, items]
+        if not len(catalog):
+            return {"expected_revenue": ev, "best_item": None, "best_price": None}
+        best = ev.argmax(axis=2)
+        best_price = np.take_along_axis(np.broadcast_to(prices[:, None, :], ev.shape), best[..., None], axis=2)[..., 0]
+        return {"expected_revenue": ev, "best_item": best, "best_price": best_price}
+
+
+def exclude_assets(catalog: Catalog, asset_ids: Collection[str]) -> Catalog:
+    """catalog minus the given assets (e.g. already bought); may come back empty."""
+    if not asset_ids:
+        return catalog
+    if isinstance(catalog, snapshot.CatalogColumns):
+        return catalog.without(asset_ids)
+    drop = set(asset_ids)
+    return [c for c in catalog if c.ppv_asset_id not in drop]
+
+def _base_prices(catalog: Catalog) -> np.ndarray:
+    if isinstance(catalog, snapshot.CatalogColumns):
+        return catalog.base_price
+    return np.fromiter((c.base_price for c in catalog), dtype=np.float64, count=len(catalog))
+
+def _multiples(floor: float, ceiling: float, step: float) -> Tuple[int, int]:
+    """Index range [lo, hi] of the multiples of step inside [floor, ceiling]."""
+    return int(np.ceil(floor / step)), int(np.floor(ceiling / step))
+
+@lru_cache(maxsize=256)
+def _decimals(step: float) -> int:
+    # round to the step's own precision: 433 * 0.1 must quote 43.3, not 43.300000000000004
+    return max(0, -Decimal(repr(step)).normalize().as_tuple().exponent)
+
+@lru_cache(maxsize=64)
+def _ladder(floor: float, ceiling: float, step: float) -> np.ndarray:
+    lo, hi = _multiples(floor, ceiling, step)
+    if hi - lo + 1 > MAX_PRICE_RUNGS:
+        raise ValueError(f"price ladder has {hi - lo + 1} rungs (max {MAX_PRICE_RUNGS})")
+    rungs = np.round(np.arange(lo, hi + 1, dtype=np.float64) * step, _decimals(step))
+    out = np.unique(np.concatenate([rungs, [floor, ceiling]]))
+    out = out[(out >= floor) & (out <= ceiling)]
+    out.setflags(write=False)
+    return out
+
+@lru_cache(maxsize=4)
+def load_pricing_engine(path: Optional[str] = None) -> PricingEngine:
+    p = Path(path) if path else DEFAULT_PRICING_PATH
+    return PricingEngine(json.loads(p.read_text(encoding="utf-8")))
+
+@lru_cache(maxsize=2)
+def _snapshot_engine(snap) -> PricingEngine:
+    return PricingEngine(snap.json("config.pricing"))
+
+def engine() -> PricingEngine:
+    snap = snapshot.current()
+    if snap is not None:
+        return _snapshot_engine(snap)
+    return load_pricing_engine(get_settings().pricing_config)
+
+def choose_ppv(catalog: Catalog, tier: str, budgets: Budgets,
+               price_intent: float) -> Tuple[Optional[PPVPlan], Dict[str, Any]]:
+    return engine().choose(catalog, tier, budgets, price_intent)
+
+def choose_price(budget: Dict, catalog: Optional[List[Dict]] = None, tier: str = "silver",
+                 price_intent: float = 0.55) -> float:
+    """
+    Dict-shaped helper kept for callers of the old API; same engine as decide.
+    Without a catalog the floor is returned.
+    """
+    budgets = Budgets(**{k: v for k, v in budget.items() if k in Budgets.model_fields})
+    items = [CatalogItem(ppv_asset_id=str(x.get("ppv_asset_id", i)), media_type="photo",
+                         base_price=float(x.get("base_price", budgets.price_floor)), description="")
+             for i, x in enumerate(catalog or [])]
+    plan, _ = choose_ppv(items, tier, budgets, price_intent)
+    return float(plan.price) if plan else float(budgets.price_floor)
@@ -1,32 +1,43 @@
 from __future__ import annotations
-import re
-from typing import List
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Optional
 from .contracts import MessageLine, Signals
-
-_emoji_re = re.compile(r"[\U0001F300-\U0001FAFF]")
-_q_re = re.compile(r"\?+")
-_exc_re = re.compile(r"!+")
-_imperatives = {"send", "show", "tell", "gimme", "give", "call", "answer", "reply", "prove"}
+from .textfeatures import features_of
+from . import textmodel
 
 def _rate(n: int, d: int) -> float:
     return 0.0 if d <= 0 else max(0.0, min(1.0, n / d))
 
-def _sentiment_guess(text: str) -> float:
-    t = text.lower()
-    pos = sum(t.count(k) for k in ["love", "like", "sweet", "cute", "nice", "great", "good", "😍", "🥰"])
-    neg = sum(t.count(k) for k in ["hate", "mad", "angry", "annoy", "bad", "worst", "🙄", "😠"])
-    return max(-1.0, min(1.0, (pos - neg) / 5.0))
+# Last full-quality Signals per fan window, served as-is when admission control
+# degrades a request (app/admission.py).
+_RECENT_MAX = 4096
+_recent: "OrderedDict[bytes, Signals]" = OrderedDict()
+_recent_lock = threading.Lock()
+
+def _window_key(texts: List[str]) -> bytes:
+    return hashlib.blake2b("\x1f".join(texts).encode("utf-8"), digest_size=16).digest()
+
+def recent_signals(fan_last: List[MessageLine]) -> Optional[Signals]:
+    key = _window_key([m.text for m in fan_last][-8:])
+    with _recent_lock:
+        sigs = _recent.get(key)
+        if sigs is not None:
+            _recent.move_to_end(key)
+    return sigs.model_copy() if sigs is not None else None
 
-def derive_signals(fan_last: List[MessageLine]) -> Signals:
+def derive_signals(fan_last: List[MessageLine], use_model: bool = True) -> Signals:
     texts = [m.text for m in fan_last][-8:]
-    total = len(texts)
+    feats = features_of(texts)
+    total = len(feats)
 
-    emoji_hits = sum(1 for t in texts if _emoji_re.search(t))
-    q_hits = sum(1 for t in texts if _q_re.search(t))
-    exc_hits = sum(1 for t in texts if _exc_re.search(t))
-    imper = sum(any(w in _imperatives for w in re.findall(r"[a-z']+", t.lower())) for t in texts)
+    emoji_hits = sum(1 for f in feats if f.has_emoji)
+    q_hits = sum(1 for f in feats if f.has_question)
+    exc_hits = sum(1 for f in feats if f.has_exclaim)
+    imper = sum(1 for f in feats if f.imperative)
 
-    avg_chars = sum(len(t) for t in texts) / total if total else 0
+    avg_chars = sum(f.length for f in feats) / total if total else 0
     style_fp = {
         "avg_chars": float(avg_chars),
         "emoji_rate": _rate(emoji_hits, total),
@@ -35,25 +46,32 @@ def derive_signals(fan_last: List[MessageLine]) -> Signals:
     }
 
     # Basic urgency proxy: short bursts + questions + imperatives
-    burst = sum(1 for t in texts[-3:] if len(t) <= 40)
+    burst = sum(1 for f in feats[-3:] if f.length <= 40)
     reply_urgency = max(0.0, min(1.0, 0.25 + 0.18*_rate(q_hits, total) + 0.15*_rate(imper, total) + 0.18*_rate(burst, 3)))
 
     sentiment = 0.0
-    if texts:
-        sentiment = sum(_sentiment_guess(t) for t in texts[-3:]) / min(3, len(texts))
+    if feats:
+        sentiment = sum(f.sentiment for f in feats[-3:]) / min(3, len(feats))
 
-    # very rough proxy for price intent: words that hint willingness to buy
-    price_words = ["price", "cost", "how much", "send pic", "send video", "pay", "tip", "buy"]
+    # very rough proxy for price intent: any line with a buying word
     price_intent = 0.0
-    joined = " ".join(texts).lower()
-    if any(w in joined for w in price_words):
+    if any(f.price_hit for f in feats):
         price_intent = 0.55 + 0.15*_rate(imper, total) + 0.1*_rate(q_hits, total)
         price_intent = min(1.0, price_intent)
 
     question_density = _rate(q_hits, total)
+
+    # local model (BRAIN_TEXT_MODEL) replaces the three lexical guesses when configured
+    m = textmodel.model() if use_model else None
+    if m is not None and texts:
+        scores = m.predict(texts)
+        sentiment = float(scores[-3:, 0].mean())
+        price_intent = float(scores[:, 1].max())
+        question_density = float(scores[:, 2].mean())
+
     interruption = (burst >= 2 and q_hits >= 1)
 
-    return Signals(
+    sigs = Signals(
         reply_urgency=reply_urgency,
         sentiment_score=sentiment,
         price_intent=price_intent,
@@ -63,3 +81,10 @@ def derive_signals(fan_last: List[MessageLine]) -> Signals:
         imperative_hits=imper,
         style_fp=style_fp,
     )
+    if use_model:
+        with _recent_lock:
+            _recent[_window_key(texts)] = sigs
+            _recent.move_to_end(_window_key(texts))
+            while len(_recent) > _RECENT_MAX:
+                _recent.popitem(last=False)
+    return sigs
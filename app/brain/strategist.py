@@ -1,7 +1,7 @@
 from __future__ import annotations
-import re
 from typing import List, Dict, Any
 from .contracts import BrainInput, WriterInstructions, WriterDeliveryStyle, Mirroring, WriterStyle, Pack
+from .textfeatures import features_of, topic_matchers
 
 class Candidate:
     def __init__(self, id: str, pack: Pack, forecast: float, wi: WriterInstructions):
@@ -37,22 +37,13 @@ def _build_delivery_style(inp: BrainInput) -> WriterDeliveryStyle:
     ds.emoji_level = min(ds.emoji_level, _tier_emoji_cap(inp.profile.tier))
     return ds
 
-_topics_re = [
-    (re.compile(r"\bfish(ing|er|)\b", re.I), "his fishing trip tomorrow; playful jealous angle"),
-    (re.compile(r"\bgym|workout|lift\b", re.I), "his gym session; admiring + playful challenge"),
-    (re.compile(r"\b(bday|birthday)\b", re.I), "his upcoming birthday; make him feel special"),
-    (re.compile(r"\btrip|flight|travel|airport\b", re.I), "his trip plans; warm check-in + tease about missing you"),
-    (re.compile(r"\bwork|shift|meeting\b", re.I), "his workday; supportive + a tiny flirty hook"),
-    (re.compile(r"\btomorrow|tonight\b", re.I), "the near-time plan he mentioned; be specific & responsive"),
-]
-
 def _extract_talk_about(inp: BrainInput, limit: int = 2) -> List[str]:
     lines = [m.text for m in inp.messages.fan_last][-8:] + [m.text for m in inp.messages.creator_last][-8:]
     lines = [x for x in lines if x]
     found = []
-    joined = " \n ".join(lines)
-    for rx, hint in _topics_re:
-        if rx.search(joined):
+    hits = {i for f in features_of(lines) for i in f.topics}
+    for i, (_rx, hint) in enumerate(topic_matchers()):
+        if i in hits:
             found.append(hint)
     # memory crumbs
     if inp.memory and inp.memory.storybook:
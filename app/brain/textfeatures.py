@@ -0,0 +1,155 @@
+from __future__ import annotations
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from app import snapshot
+from app.settings import get_settings
+
+# Text-features stage: every message line is analyzed once into a compact record
+# that the signalizer and strategist both read. Records are cached by content hash
+# (plus the lexicon/topic snapshot version) in a bounded LRU, so on the next turn
+# only the new lines cost anything.
+
+_emoji_re = re.compile(r"[\U0001F300-\U0001FAFF]")
+_q_re = re.compile(r"\?+")
+_exc_re = re.compile(r"!+")
+_word_re = re.compile(r"[a-z']+")
+
+# Built-in lexicons; a snapshot (BRAIN_SNAPSHOT) built with --lexicons may replace them per name.
+LEXICONS = {
+    "imperatives": ["send", "show", "tell", "gimme", "give", "call", "answer", "reply", "prove"],
+    "sentiment_pos": ["love", "like", "sweet", "cute", "nice", "great", "good", "😍", "🥰"],
+    "sentiment_neg": ["hate", "mad", "angry", "annoy", "bad", "worst", "🙄", "😠"],
+    # very rough proxy for price intent: words that hint willingness to buy
+    "price_words": ["price", "cost", "how much", "send pic", "send video", "pay", "tip", "buy"],
+}
+_BUILTIN = {k: frozenset(v) for k, v in LEXICONS.items()}
+
+# Topic table: pattern -> talk_about hint for the strategist.
+TOPICS = [
+    (r"\bfish(ing|er|)\b", "his fishing trip tomorrow; playful jealous angle"),
+    (r"\bgym|workout|lift\b", "his gym session; admiring + playful challenge"),
+    (r"\b(bday|birthday)\b", "his upcoming birthday; make him feel special"),
+    (r"\btrip|flight|travel|airport\b", "his trip plans; warm check-in + tease about missing you"),
+    (r"\bwork|shift|meeting\b", "his workday; supportive + a tiny flirty hook"),
+    (r"\btomorrow|tonight\b", "the near-time plan he mentioned; be specific & responsive"),
+]
+_topics_re = [(re.compile(p, re.I), hint) for p, hint in TOPICS]
+
+def lexicon(name: str):
+    """Membership + iteration over a lexicon; served from the shared snapshot when mapped."""
+    snap = snapshot.current()
+    if snap is not None and snap.has(f"lexicon.{name}"):
+        return snap.strs(f"lexicon.{name}")
+    return _BUILTIN[name]
+
+@lru_cache(maxsize=2)
+def _snapshot_topics(snap) -> List:
+    return [(re.compile(p, re.I), h) for p, h in zip(snap.strs("topics.pattern"), snap.strs("topics.hint"))]
+
+def topic_matchers() -> List:
+    """[(compiled pattern, hint)] — index i is what LineFeatures.topics refers to."""
+    snap = snapshot.current()
+    return _snapshot_topics(snap) if snap is not None else _topics_re
+
+class LineFeatures:
+    __slots__ = ("lower", "tokens", "length", "has_emoji", "has_question", "has_exclaim",
+                 "imperative", "sentiment_pos", "sentiment_neg", "price_hit", "topics")
+
+    def __init__(self, lower: str, tokens: Tuple[str, ...], length: int, has_emoji: bool,
+                 has_question: bool, has_exclaim: bool, imperative: bool, sentiment_pos: int,
+                 sentiment_neg: int, price_hit: bool, topics: Tuple[int, ...]):
+        self.lower = lower
+        self.tokens = tokens
+        self.length = length
+        self.has_emoji = has_emoji
+        self.has_question = has_question
+        self.has_exclaim = has_exclaim
+        self.imperative = imperative
+        self.sentiment_pos = sentiment_pos
+        self.sentiment_neg = sentiment_neg
+        self.price_hit = price_hit
+        self.topics = topics                # indices into the topic table
+
+    @property
+    def sentiment(self) -> float:
+        return max(-1.0, min(1.0, (self.sentiment_pos - self.sentiment_neg) / 5.0))
+
+
+def _analyze(text: str) -> LineFeatures:
+    lower = text.lower()
+    tokens = tuple(_word_re.findall(lower))
+    imperatives = lexicon("imperatives")
+    return LineFeatures(
+        lower=lower,
+        tokens=tokens,
+        length=len(text),
+        has_emoji=_emoji_re.search(text) is not None,
+        has_question=_q_re.search(text) is not None,
+        has_exclaim=_exc_re.search(text) is not None,
+        imperative=any(w in imperatives for w in tokens),
+        sentiment_pos=sum(lower.count(k) for k in lexicon("sentiment_pos")),
+        sentiment_neg=sum(lower.count(k) for k in lexicon("sentiment_neg")),
+        price_hit=any(w in lower for w in lexicon("price_words")),
+        topics=tuple(i for i, (rx, _hint) in enumerate(topic_matchers()) if rx.search(text)),
+    )
+
+
+class _LRU:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._d: "OrderedDict[Tuple[int, bytes], LineFeatures]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key) -> Optional[LineFeatures]:
+        with self._lock:
+            rec = self._d.get(key)
+            if rec is None:
+                self.misses += 1
+                return None
+            self._d.move_to_end(key)
+            self.hits += 1
+            return rec
+
+    def put(self, key, rec: LineFeatures) -> None:
+        with self._lock:
+            self._d[key] = rec
+            self._d.move_to_end(key)
+            while len(self._d) > self.maxsize:
+                self._d.popitem(last=False)
+
+    def info(self) -> dict:
+        with self._lock:
+            return {"size": len(self._d), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+_cache: Optional[_LRU] = None
+
+def _lru() -> _LRU:
+    global _cache
+    if _cache is None:
+        _cache = _LRU(get_settings().text_feature_cache_size)
+    return _cache
+
+def line_features(text: str) -> LineFeatures:
+    snap = snapshot.current()
+    key = (snap.build_id if snap is not None else 0,
+           hashlib.blake2b(text.encode("utf-8"), digest_size=12).digest())
+    cache = _lru()
+    rec = cache.get(key)
+    if rec is None:
+        rec = _analyze(text)
+        cache.put(key, rec)
+    return rec
+
+def features_of(texts: List[str]) -> List[LineFeatures]:
+    return [line_features(t) for t in texts]
+
+def cache_info() -> dict:
+    return _lru().info()
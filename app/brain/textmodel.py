@@ -0,0 +1,201 @@
+from __future__ import annotations
+import argparse
+import json
+import logging
+import sys
+import time
+import zlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.settings import get_settings
+
+log = logging.getLogger("uvicorn.error")
+
+# Tiny local classifier for sentiment, price intent and question intent.
+# Features are hashed word uni/bigrams and char 3-5 grams (signed, L2-normalized);
+# the model is one linear layer stored as a single float32 .npy of shape
+# [dim + 1, 3] (last row = bias). Heads: sentiment = tanh, the two intents = sigmoid.
+#
+# Train offline on labelled JSONL ({"text", "sentiment"?, "price_intent"?, "question"?}):
+#   python -m app.brain.textmodel train labelled.jsonl --out textmodel.npy
+# Serve with BRAIN_TEXT_MODEL=textmodel.npy; without it the signalizer keeps its heuristics.
+
+HEADS = ("sentiment", "price_intent", "question")
+CHAR_NGRAMS = (3, 4, 5)
+DEFAULT_DIM_BITS = 18
+# namespaces: distinct crc32 start values keep word / bigram / char grams apart
+_SEED_WORD, _SEED_BIGRAM, _SEED_CHAR = 0x5EED0001, 0x5EED0002, 0x5EED0003
+
+def _hashes(text: str) -> List[int]:
+    lower = text.lower()
+    words = [w.encode("utf-8") for w in lower.split()]
+    hs = [zlib.crc32(w, _SEED_WORD) for w in words]
+    hs += [zlib.crc32(a + b" " + b, _SEED_BIGRAM) for a, b in zip(words, words[1:])]
+    padded = b" " + b" ".join(words) + b" "
+    for n in CHAR_NGRAMS:
+        seed = _SEED_CHAR + n
+        hs += [zlib.crc32(padded[i:i + n], seed) for i in range(len(padded) - n + 1)]
+    return hs
+
+@lru_cache(maxsize=65536)
+def _line_hashes(text: str) -> Tuple[int, ...]:
+    return tuple(_hashes(text))
+
+def featurize(texts: Sequence[str], dim: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Sparse batch as (row, index, value) with one entry per distinct (row, index);
+    values are signed counts L2-normalized per row. The bias column is not included.
+    """
+    per_line = [_line_hashes(t) for t in texts]
+    lens = np.fromiter((len(h) for h in per_line), dtype=np.int64, count=len(per_line))
+    hs = np.fromiter((h for line in per_line for h in line), dtype=np.uint32, count=int(lens.sum()))
+    key = np.repeat(np.arange(len(texts), dtype=np.int64), lens) * dim + (hs % dim)
+    sign = np.where(hs & 0x80000000, 1.0, -1.0)
+    ukey, inv = np.unique(key, return_inverse=True)
+    val = np.bincount(inv, weights=sign)
+    row, idx = np.divmod(ukey, dim)
+    norm = np.sqrt(np.bincount(row, weights=val * val, minlength=len(texts)))
+    norm[norm == 0] = 1.0
+    return row, idx, (val / norm[row]).astype(np.float32)
+
+def _activate(z: np.ndarray) -> np.ndarray:
+    out = np.empty_like(z)
+    out[:, 0] = np.tanh(z[:, 0])
+    out[:, 1:] = 1.0 / (1.0 + np.exp(-z[:, 1:]))
+    return out
+
+
+class TextModel:
+    def __init__(self, weights: np.ndarray):
+        if weights.ndim != 2 or weights.shape[1] != len(HEADS):
+            raise ValueError(f"expected weights [dim+1, {len(HEADS)}], got {weights.shape}")
+        self.W = np.ascontiguousarray(weights, dtype=np.float32)
+        self.dim = self.W.shape[0] - 1
+
+    def predict(self, texts: Sequence[str]) -> np.ndarray:
+        """[n, 3] of (sentiment -1..1, price_intent 0..1, question 0..1); one gather for the batch."""
+        n = len(texts)
+        if not n:
+            return np.zeros((0, len(HEADS)), dtype=np.float32)
+        row, idx, val = featurize(texts, self.dim)
+        contrib = self.W[idx] * val[:, None]
+        z = np.stack([np.bincount(row, weights=contrib[:, k], minlength=n) for k in range(len(HEADS))], axis=1)
+        return _activate(z + self.W[self.dim])
+
+
+@lru_cache(maxsize=4)
+def load_model(path: str) -> TextModel:
+    return TextModel(np.load(path, allow_pickle=False))
+
+_failed: set = set()
+
+def model() -> Optional[TextModel]:
+    """The configured model, or None (switch off, or the file failed to load)."""
+    path = get_settings().text_model_path
+    if not path or path in _failed:
+        return None
+    try:
+        return load_model(path)
+    except (OSError, ValueError) as e:
+        _failed.add(path)
+        log.warning("text model %s unavailable, using heuristic signals: %s", path, e)
+        return None
+
+
+# ------------------------------ training ------------------------------
+def _read_jsonl(path: Path) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    texts, ys, masks = [], [], []
+    with path.open(encoding="utf-8") as fh:
+        for line in fh:
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            texts.append(str(rec["text"]))
+            ys.append([float(rec.get(h) or 0.0) for h in HEADS])
+            masks.append([1.0 if rec.get(h) is not None else 0.0 for h in HEADS])
+    return texts, np.asarray(ys, dtype=np.float32), np.asarray(masks, dtype=np.float32)
+
+def train(texts: List[str], y: np.ndarray, mask: np.ndarray, dim: int, epochs: int = 8,
+          lr: float = 0.2, l2: float = 1e-6, seed: int = 0) -> np.ndarray:
+    """AdaGrad SGD; squared loss on the tanh head, log loss on the sigmoid heads."""
+    rng = np.random.default_rng(seed)
+    W = np.zeros((dim + 1, len(HEADS)), dtype=np.float32)
+    G = np.full_like(W, 1e-8)
+    row, col, v = featurize(texts, dim)
+    bounds = np.searchsorted(row, np.arange(len(texts) + 1))
+    bias = np.array([dim])
+    feats = [(np.concatenate([col[a:b], bias]), np.append(v[a:b], np.float32(1.0)))
+             for a, b in zip(bounds[:-1], bounds[1:])]
+    for _ in range(epochs):
+        for i in rng.permutation(len(texts)):
+            idx, val = feats[i]
+            p = _activate((val @ W[idx])[None, :])[0]
+            g = p - y[i]
+            g[0] *= 1.0 - p[0] * p[0]
+            g *= mask[i]
+            grad = val[:, None] * g[None, :] + l2 * W[idx]
+            G[idx] += grad * grad
+            W[idx] -= lr * grad / np.sqrt(G[idx])
+    return W
+
+def evaluate(m: TextModel, texts: List[str], y: np.ndarray, mask: np.ndarray) -> Dict[str, float]:
+    p = m.predict(texts)
+    out: Dict[str, float] = {}
+    for k, h in enumerate(HEADS):
+        sel = mask[:, k] > 0
+        if not sel.any():
+            continue
+        if h == "sentiment":
+            out["sentiment_mae"] = round(float(np.abs(p[sel, k] - y[sel, k]).mean()), 4)
+        else:
+            out[f"{h}_acc"] = round(float(((p[sel, k] >= 0.5) == (y[sel, k] >= 0.5)).mean()), 4)
+    return out
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m app.brain.textmodel")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    t = sub.add_parser("train", help="train on labelled JSONL and write the weights .npy")
+    t.add_argument("data", type=Path)
+    t.add_argument("--out", type=Path, required=True)
+    t.add_argument("--dim-bits", type=int, default=DEFAULT_DIM_BITS)
+    t.add_argument("--epochs", type=int, default=8)
+    t.add_argument("--lr", type=float, default=0.2)
+    t.add_argument("--l2", type=float, default=1e-6)
+    t.add_argument("--valid", type=float, default=0.1, help="held-out fraction for the report")
+    p = sub.add_parser("predict", help="score lines with a weights file")
+    p.add_argument("weights", type=Path)
+    p.add_argument("texts", nargs="+")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "predict":
+        m = TextModel(np.load(args.weights, allow_pickle=False))
+        t0 = time.perf_counter()
+        scores = m.predict(args.texts)
+        us = (time.perf_counter() - t0) * 1e6 / len(args.texts)
+        for text, row in zip(args.texts, scores):
+            print(json.dumps({"text": text, **{h: round(float(v), 4) for h, v in zip(HEADS, row)}}, ensure_ascii=False))
+        print(f"{us:.1f} us/line (cold)", file=sys.stderr)
+        return 0
+
+    texts, y, mask = _read_jsonl(args.data)
+    order = np.random.default_rng(1).permutation(len(texts))
+    n_valid = int(len(texts) * args.valid)
+    va, tr = order[:n_valid], order[n_valid:]
+    W = train([texts[i] for i in tr], y[tr], mask[tr], 1 << args.dim_bits,
+              epochs=args.epochs, lr=args.lr, l2=args.l2)
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    np.save(args.out, W)
+    report = {"out": str(args.out), "train": len(tr), "valid": len(va), "dim": 1 << args.dim_bits}
+    if len(va):
+        report.update(evaluate(TextModel(W), [texts[i] for i in va], y[va], mask[va]))
+    print(json.dumps(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
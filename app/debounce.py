@@ -0,0 +1,134 @@
+from __future__ import annotations
+import asyncio
+import contextvars
+import threading
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from app.admission import settling
+from app.settings import get_settings
+
+# Per-thread debounce. A request that declares a settle window (AutoIn.settle_ms)
+# waits that long before computing; any newer request for the same fan_id cancels
+# every debounced turn still pending or running for that fan. Running turns stop
+# at the next checkpoint() between pipeline stages, and a strategist LLM call
+# given cancel_event() is abandoned as soon as the event is set. Only the latest
+# state gets a decision; superseded turns answer 409. The settle window is awaited
+# on the event loop, so a pending turn holds no worker thread. Requests without a
+# fan_id are anonymous and never take part in debouncing.
+
+class Superseded(Exception):
+    def __init__(self, fan_id: str):
+        super().__init__(f"superseded by a newer request for fan_id={fan_id}")
+        self.fan_id = fan_id
+
+
+class Turn:
+    __slots__ = ("fan_id", "debounced", "cancel", "_wake")
+
+    def __init__(self, fan_id: str, debounced: bool):
+        self.fan_id = fan_id
+        self.debounced = debounced
+        self.cancel = threading.Event()
+        self._wake: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = None
+
+    def check(self) -> None:
+        if self.debounced and self.cancel.is_set():
+            raise Superseded(self.fan_id)
+
+    def supersede(self) -> None:
+        self.cancel.set()
+        wake = self._wake
+        if wake is not None:
+            wake[0].call_soon_threadsafe(wake[1].set)
+
+    async def settle(self, seconds: float) -> bool:
+        """Wait out the settle window on the event loop; False if superseded meanwhile."""
+        ev = asyncio.Event()
+        self._wake = (asyncio.get_running_loop(), ev)
+        if self.cancel.is_set():
+            return False
+        try:
+            await asyncio.wait_for(ev.wait(), seconds)
+        except asyncio.TimeoutError:
+            return not self.cancel.is_set()
+        finally:
+            self._wake = None
+        return False
+
+
+class Debouncer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active: Dict[str, List[Turn]] = {}
+        self.settled = 0
+        self.superseded = 0
+
+    def enter(self, fan_id: str, debounced: bool) -> Turn:
+        turn = Turn(fan_id, debounced)
+        with self._lock:
+            older = self._active.setdefault(fan_id, [])
+            for t in older:
+                if t.debounced and not t.cancel.is_set():
+                    t.supersede()
+                    self.superseded += 1
+            older.append(turn)
+        return turn
+
+    def leave(self, turn: Turn) -> None:
+        with self._lock:
+            turns = self._active.get(turn.fan_id)
+            if turns is None:
+                return
+            turns.remove(turn)
+            if not turns:
+                del self._active[turn.fan_id]
+
+    def mark_settled(self) -> None:
+        with self._lock:
+            self.settled += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"active_threads": len(self._active), "settled": self.settled,
+                    "superseded": self.superseded}
+
+
+DEBOUNCE = Debouncer()
+_current: contextvars.ContextVar[Optional[Turn]] = contextvars.ContextVar("brain_turn", default=None)
+
+@asynccontextmanager
+async def turn(fan_id: Optional[str], settle_ms: int) -> AsyncIterator[Optional[Turn]]:
+    """
+    Register a decision turn for fan_id. Every turn supersedes older debounced ones;
+    it is itself cancellable only when it declared a settle window (settle_ms > 0).
+    Without a fan_id nothing is registered and the body runs at once (yields None).
+    """
+    if not fan_id:
+        yield None
+        return
+    settle_ms = max(0, min(settle_ms, get_settings().debounce_max_settle_ms))
+    t = DEBOUNCE.enter(fan_id, settle_ms > 0)
+    token = _current.set(t)
+    try:
+        if t.debounced:
+            with settling():
+                settled = await t.settle(settle_ms / 1000.0)
+            if not settled:
+                raise Superseded(fan_id)
+            DEBOUNCE.mark_settled()
+        yield t
+    finally:
+        _current.reset(token)
+        DEBOUNCE.leave(t)
+
+def checkpoint() -> None:
+    """Raise Superseded if the current turn has been replaced by a newer request."""
+    t = _current.get()
+    if t is not None:
+        t.check()
+
+def cancel_event() -> Optional[threading.Event]:
+    """Event set when the current debounced turn is superseded (pass to StrategistService.plan)."""
+    t = _current.get()
+    return t.cancel if t is not None and t.debounced else None
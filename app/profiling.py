@@ -0,0 +1,279 @@
+from __future__ import annotations
+import cProfile
+import functools
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Literal, Optional
+
+# On-demand profiler for live workers. A session is armed via /debug/profile and
+# covers the next N requests or T seconds; routes opt in with @profiled. When no
+# session is armed the decorator costs one attribute check.
+
+Mode = Literal["deterministic", "sampling", "alloc"]
+
+_APP_DIR = str(Path(__file__).resolve().parent)
+_local = threading.local()
+
+def _is_brain_file(filename: str) -> bool:
+    return filename.startswith(_APP_DIR)
+
+def _short(filename: str) -> str:
+    return filename[len(_APP_DIR) - len("app"):] if _is_brain_file(filename) else filename
+
+
+class ProfileSession:
+    def __init__(self, mode: Mode, max_requests: Optional[int], seconds: Optional[float],
+                 sample_interval_ms: float = 2.0):
+        self.mode = mode
+        self.max_requests = max_requests
+        self.deadline = (time.monotonic() + seconds) if seconds else None
+        self.sample_interval = max(0.0005, sample_interval_ms / 1000.0)
+        self.started_at = time.time()
+        self.requests_seen = 0
+        self.finished = False
+        self._lock = threading.Lock()
+        # deterministic
+        self._stats: Optional[pstats.Stats] = None
+        self._capture = threading.Lock()
+        self.skipped = 0  # requests that ran unprofiled because a capture was in progress
+        # sampling
+        self._active_threads: Dict[int, int] = {}
+        self._self_samples: Counter = Counter()
+        self._incl_samples: Counter = Counter()
+        self._total_samples = 0
+        self._sampler: Optional[threading.Thread] = None
+        # alloc
+        self._we_started_tracemalloc = False
+        self._alloc_size: Counter = Counter()
+        self._alloc_count: Counter = Counter()
+
+        if mode == "sampling":
+            self._sampler = threading.Thread(target=self._sample_loop, name="brain-profiler", daemon=True)
+            self._sampler.start()
+        elif mode == "alloc" and not tracemalloc.is_tracing():
+            tracemalloc.start(8)
+            self._we_started_tracemalloc = True
+
+    # ---- lifecycle ----
+    def expired(self) -> bool:
+        if self.finished:
+            return True
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return True
+        return self.max_requests is not None and self.requests_seen >= self.max_requests
+
+    def claim(self) -> bool:
+        """Reserve one request slot; False once the session is exhausted."""
+        with self._lock:
+            if self.expired():
+                self._finish_locked()
+                return False
+            self.requests_seen += 1
+            return True
+
+    def stop(self) -> None:
+        with self._lock:
+            self._finish_locked()
+
+    def _finish_locked(self) -> None:
+        if self.finished:
+            return
+        self.finished = True
+        if self._we_started_tracemalloc:
+            tracemalloc.stop()
+            self._we_started_tracemalloc = False
+
+    # ---- capture ----
+    def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        if self.mode == "deterministic":
+            return self._run_deterministic(fn, *args, **kwargs)
+        if self.mode == "sampling":
+            tid = threading.get_ident()
+            with self._lock:
+                self._active_threads[tid] = self._active_threads.get(tid, 0) + 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    left = self._active_threads.get(tid, 1) - 1
+                    if left <= 0:
+                        self._active_threads.pop(tid, None)
+                    else:
+                        self._active_threads[tid] = left
+        # alloc: diff snapshots around the request to find per-request garbage
+        if not tracemalloc.is_tracing():
+            return fn(*args, **kwargs)
+        before = tracemalloc.take_snapshot()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            after = tracemalloc.take_snapshot()
+            flt = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+            diff = after.filter_traces(flt).compare_to(before.filter_traces(flt), "traceback")
+            with self._lock:
+                for st in diff:
+                    if st.size_diff <= 0:
+                        continue
+                    # attribute to the innermost brain frame when there is one
+                    frames = list(st.traceback)
+                    frame = next((f for f in reversed(frames) if _is_brain_file(f.filename)), frames[-1])
+                    key = f"{_short(frame.filename)}:{frame.lineno}"
+                    self._alloc_size[key] += st.size_diff
+                    self._alloc_count[key] += st.count_diff
+
+    def _run_deterministic(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        # One capture at a time: from 3.12 cProfile takes the process-wide
+        # sys.monitoring slot, so a second concurrent enable() raises. Requests that
+        # find the capture busy (or the slot held by another tool) run unprofiled and
+        # give their slot back; the profiler never fails a request.
+        if not self._capture.acquire(blocking=False):
+            self._unclaim()
+            return fn(*args, **kwargs)
+        try:
+            prof = cProfile.Profile()
+            try:
+                prof.enable()
+            except ValueError:
+                self._unclaim()
+                return fn(*args, **kwargs)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                prof.disable()
+                try:
+                    stats = pstats.Stats(prof)
+                except (TypeError, ValueError):  # nothing recorded
+                    stats = None
+                if stats is not None:
+                    with self._lock:
+                        if self._stats is None:
+                            self._stats = stats
+                        else:
+                            self._stats.add(stats)
+        finally:
+            self._capture.release()
+
+    def _unclaim(self) -> None:
+        with self._lock:
+            self.requests_seen -= 1
+            self.skipped += 1
+
+    def _sample_loop(self) -> None:
+        while not self.expired():
+            time.sleep(self.sample_interval)
+            with self._lock:
+                tids = list(self._active_threads)
+            if not tids:
+                continue
+            frames = sys._current_frames()
+            with self._lock:
+                for tid in tids:
+                    frame = frames.get(tid)
+                    if frame is None:
+                        continue
+                    self._total_samples += 1
+                    seen = set()
+                    top = True
+                    while frame is not None:
+                        code = frame.f_code
+                        if _is_brain_file(code.co_filename):
+                            key = f"{_short(code.co_filename)}:{code.co_firstlineno}({code.co_name})"
+                            if top:
+                                self._self_samples[key] += 1
+                                top = False
+                            if key not in seen:
+                                self._incl_samples[key] += 1
+                                seen.add(key)
+                        frame = frame.f_back
+
+    # ---- reporting ----
+    def report(self, top: int = 25) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = {
+                "mode": self.mode,
+                "started_at": self.started_at,
+                "requests_seen": self.requests_seen,
+                "max_requests": self.max_requests,
+                "finished": self.expired(),
+            }
+            if self.mode == "deterministic":
+                out["skipped_concurrent"] = self.skipped
+                out["hot_functions"] = self._deterministic_rows(top)
+            elif self.mode == "sampling":
+                out["total_samples"] = self._total_samples
+                out["hot_functions"] = [
+                    {"function": k, "inclusive_samples": n, "self_samples": self._self_samples.get(k, 0),
+                     "inclusive_pct": round(100.0 * n / max(1, self._total_samples), 1)}
+                    for k, n in self._incl_samples.most_common(top)
+                ]
+            else:
+                n = max(1, self.requests_seen)
+                out["allocations"] = [
+                    {"where": k, "bytes_total": size, "bytes_per_request": round(size / n, 1),
+                     "blocks_total": self._alloc_count.get(k, 0)}
+                    for k, size in self._alloc_size.most_common(top)
+                ]
+            return out
+
+    def _deterministic_rows(self, top: int) -> List[Dict[str, Any]]:
+        if self._stats is None:
+            return []
+        rows = []
+        for (filename, lineno, name), (cc, nc, tt, ct, _callers) in self._stats.stats.items():  # type: ignore[attr-defined]
+            if not _is_brain_file(filename):
+                continue
+            rows.append({
+                "function": f"{_short(filename)}:{lineno}({name})",
+                "ncalls": nc,
+                "tottime_ms": round(tt * 1000.0, 3),
+                "cumtime_ms": round(ct * 1000.0, 3),
+            })
+        rows.sort(key=lambda r: r["cumtime_ms"], reverse=True)
+        return rows[:top]
+
+
+# ---- process-wide session ----
+_session: Optional[ProfileSession] = None
+_session_lock = threading.Lock()
+
+def start_session(mode: Mode, max_requests: Optional[int], seconds: Optional[float],
+                  sample_interval_ms: float = 2.0) -> ProfileSession:
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.stop()
+        _session = ProfileSession(mode, max_requests, seconds, sample_interval_ms)
+        return _session
+
+def current_session() -> Optional[ProfileSession]:
+    return _session
+
+def stop_session() -> Optional[ProfileSession]:
+    with _session_lock:
+        if _session is not None:
+            _session.stop()
+        return _session
+
+def profiled(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Route decorator: while a session is armed, run the handler under it.
+    Nested profiled calls count as one request.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        sess = _session
+        if sess is None or sess.finished or getattr(_local, "depth", 0) > 0:
+            return fn(*args, **kwargs)
+        if not sess.claim():
+            return fn(*args, **kwargs)
+        _local.depth = 1
+        try:
+            return sess.run(fn, *args, **kwargs)
+        finally:
+            _local.depth = 0
+    return wrapper
@@ -0,0 +1,73 @@
+from __future__ import annotations
+from collections import deque
+from typing import Any, Deque, Dict, List, Literal, Optional
+from pydantic import BaseModel
+
+from app.brain.contracts import AutoIn, CatalogItem, Context, MessageLine, Messages
+
+# Server-side state for one thread on /ws/thread/{thread_id}. The client sends the
+# full AutoIn bundle once, then small events; we keep the same 8-line windows that
+# /suggest trims to, so a session decision equals an /auto_decide on the same state.
+
+WINDOW = 8
+
+class SessionEvent(BaseModel):
+    type: Literal["init", "fan_message", "creator_message", "ppv_purchased", "context", "decide"]
+    bundle: Optional[Dict[str, Any]] = None        # init: AutoIn JSON
+    text: Optional[str] = None                     # fan_message / creator_message
+    ppv_asset_id: Optional[str] = None             # ppv_purchased
+    context: Optional[Dict[str, Any]] = None       # context: partial Context update
+
+
+class ThreadSession:
+    def __init__(self, thread_id: str, bundle: AutoIn):
+        self.thread_id = thread_id
+        self.fan_last: Deque[MessageLine] = deque(bundle.messages.fan_last[-WINDOW:], maxlen=WINDOW)
+        self.creator_last: Deque[MessageLine] = deque(bundle.messages.creator_last[-WINDOW:], maxlen=WINDOW)
+        self.memory = bundle.memory
+        self.profile = bundle.profile
+        self.budgets = bundle.budgets
+        self.context = bundle.context
+        self.catalog: Optional[List[CatalogItem]] = bundle.catalog
+        self.purchased: List[str] = list(bundle.exclude_ppv)
+        self.settle_ms = bundle.settle_ms
+        self.events = 0
+
+    def apply(self, ev: SessionEvent) -> bool:
+        """
+        Fold one event into the session. Returns True when the event should
+        trigger a fresh decision (the fan moved, or the offer state changed).
+        """
+        self.events += 1
+        if ev.type == "fan_message":
+            self.fan_last.append(MessageLine(text=ev.text or ""))
+            self.context = self.context.model_copy(update={"consecutive_no_reply": 0})
+            return True
+        if ev.type == "creator_message":
+            self.creator_last.append(MessageLine(text=ev.text or ""))
+            self.context = self.context.model_copy(
+                update={"consecutive_no_reply": self.context.consecutive_no_reply + 1})
+            return False
+        if ev.type == "ppv_purchased":
+            if ev.ppv_asset_id and ev.ppv_asset_id not in self.purchased:
+                # don't pitch the same asset again in this session, whichever catalog is used
+                self.purchased.append(ev.ppv_asset_id)
+            self.memory = self.memory.model_copy(
+                update={"facts": [*self.memory.facts, f"bought {ev.ppv_asset_id or 'ppv'}"]})
+            return True
+        if ev.type == "context":
+            self.context = Context.model_validate({**self.context.model_dump(), **(ev.context or {})})
+            return False
+        return ev.type == "decide"
+
+    def to_auto(self) -> AutoIn:
+        return AutoIn(
+            messages=Messages(fan_last=list(self.fan_last), creator_last=list(self.creator_last)),
+            memory=self.memory,
+            profile=self.profile,
+            budgets=self.budgets,
+            context=self.context,
+            catalog=self.catalog,
+            exclude_ppv=list(self.purchased),
+            settle_ms=self.settle_ms,
+        )
@@ -0,0 +1,63 @@
+from __future__ import annotations
+import os
+from functools import lru_cache
+from typing import Optional
+from pydantic import BaseModel
+
+def _env_bool(name: str, default: bool = False) -> bool:
+    raw = os.environ.get(name)
+    if raw is None:
+        return default
+    return raw.strip().lower() in {"1", "true", "yes", "on"}
+
+class Settings(BaseModel):
+    # Admin / debug
+    admin_token: Optional[str] = None
+    profiling_enabled: bool = False
+    # Startup
+    warmup_enabled: bool = True
+    # Brain tables (None = packaged default under app/brain/config)
+    missions_config: Optional[str] = None
+    pricing_config: Optional[str] = None
+    # Shared read-only snapshot (catalog, lexicons, topics, config tables); None = in-process defaults
+    snapshot_path: Optional[str] = None
+    snapshot_poll_s: float = 2.0
+    # Coalesce concurrent identical decision requests into one computation
+    singleflight_enabled: bool = True
+    # Upper bound on a request's declared debounce settle window
+    debounce_max_settle_ms: int = 2000
+    # Local sentiment / intent model weights (.npy); None = heuristic signals
+    text_model_path: Optional[str] = None
+    # Admission control on decision routes (0 disables a limit)
+    admission_soft_inflight: int = 32      # above this on arrival -> degraded decision
+    admission_max_wait_ms: float = 250.0   # queued longer than this -> degraded decision
+    admission_hard_inflight: int = 128     # at this many in flight -> 503 + Retry-After
+    admission_retry_after_s: int = 1
+    # Per-line text feature records (LRU, by content hash)
+    text_feature_cache_size: int = 50_000
+    # Exploration arm stats: shared-memory segment name ("" = per-worker only)
+    arms_shm_name: Optional[str] = "brain_arms_v1"
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Process-wide settings, read once from BRAIN_* environment variables.
+    """
+    return Settings(
+        admin_token=os.environ.get("BRAIN_ADMIN_TOKEN") or None,
+        profiling_enabled=_env_bool("BRAIN_PROFILING"),
+        warmup_enabled=_env_bool("BRAIN_WARMUP", True),
+        missions_config=os.environ.get("BRAIN_MISSIONS_CONFIG") or None,
+        pricing_config=os.environ.get("BRAIN_PRICING_CONFIG") or None,
+        snapshot_path=os.environ.get("BRAIN_SNAPSHOT") or None,
+        snapshot_poll_s=float(os.environ.get("BRAIN_SNAPSHOT_POLL_S", "2.0")),
+        singleflight_enabled=_env_bool("BRAIN_SINGLEFLIGHT", True),
+        debounce_max_settle_ms=int(os.environ.get("BRAIN_DEBOUNCE_MAX_SETTLE_MS", "2000")),
+        text_model_path=os.environ.get("BRAIN_TEXT_MODEL") or None,
+        admission_soft_inflight=int(os.environ.get("BRAIN_ADMIT_SOFT_INFLIGHT", "32")),
+        admission_max_wait_ms=float(os.environ.get("BRAIN_ADMIT_MAX_WAIT_MS", "250")),
+        admission_hard_inflight=int(os.environ.get("BRAIN_ADMIT_HARD_INFLIGHT", "128")),
+        admission_retry_after_s=int(os.environ.get("BRAIN_ADMIT_RETRY_AFTER_S", "1")),
+        text_feature_cache_size=int(os.environ.get("BRAIN_TEXT_FEATURE_CACHE", "50000")),
+        arms_shm_name=os.environ.get("BRAIN_ARMS_SHM", "brain_arms_v1") or None,
+    )
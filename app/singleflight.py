@@ -0,0 +1,116 @@
+from __future__ import annotations
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+from pydantic import BaseModel
+
+from app.settings import get_settings
+
+# Single-flight coalescing for decision routes. Identical concurrent requests
+# (same route, same canonical payload) share one computation: the first caller
+# runs it, later callers wait on its Future and get the same result (or the same
+# exception). Sync handlers run in the threadpool and block on Future.result();
+# async handlers await the same Future, so both kinds can share one flight.
+
+def _canon(v: Any) -> Any:
+    if isinstance(v, BaseModel):
+        return v.model_dump(mode="json")
+    if isinstance(v, dict):
+        return {str(k): _canon(x) for k, x in v.items()}
+    if isinstance(v, (list, tuple)):
+        return [_canon(x) for x in v]
+    return v
+
+def request_key(route: str, *args, **kwargs) -> str:
+    """Canonical hash of a call: sorted-key JSON of the (pydantic-dumped) arguments."""
+    body = json.dumps([route, _canon(list(args)), _canon(kwargs)], sort_keys=True,
+                      separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.blake2b(body.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        self.leaders: Dict[str, int] = {}
+        self.coalesced: Dict[str, int] = {}
+
+    def _join(self, route: str, key: str):
+        """(future, leader?) — registers a new flight unless one is already running."""
+        with self._lock:
+            fut = self._calls.get(key)
+            if fut is not None:
+                self.coalesced[route] = self.coalesced.get(route, 0) + 1
+                return fut, False
+            fut = Future()
+            self._calls[key] = fut
+            self.leaders[route] = self.leaders.get(route, 0) + 1
+            return fut, True
+
+    def _land(self, key: str, fut: Future, result: Any = None, exc: Optional[BaseException] = None) -> None:
+        with self._lock:
+            self._calls.pop(key, None)
+        if exc is not None:
+            fut.set_exception(exc)
+        else:
+            fut.set_result(result)
+
+    def do(self, route: str, key: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        fut, leader = self._join(route, key)
+        if not leader:
+            return fut.result()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self._land(key, fut, exc=e)
+            raise
+        self._land(key, fut, result)
+        return result
+
+    async def do_async(self, route: str, key: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        fut, leader = self._join(route, key)
+        if not leader:
+            return await asyncio.wrap_future(fut)
+        try:
+            result = await fn(*args, **kwargs)
+        except BaseException as e:
+            self._land(key, fut, exc=e)
+            raise
+        self._land(key, fut, result)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"in_flight": len(self._calls), "leaders": dict(self.leaders),
+                    "coalesced": dict(self.coalesced)}
+
+
+FLIGHTS = SingleFlight()
+
+def coalesced(route: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Route decorator: concurrent calls with an identical canonical payload share one
+    computation. Works on sync and async handlers; BRAIN_SINGLEFLIGHT=0 turns it off.
+    """
+    def deco(fn: Callable[..., Any]) -> Callable[..., Any]:
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def awrapper(*args, **kwargs):
+                if not get_settings().singleflight_enabled:
+                    return await fn(*args, **kwargs)
+                return await FLIGHTS.do_async(route, request_key(route, *args, **kwargs), fn, *args, **kwargs)
+            return awrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not get_settings().singleflight_enabled:
+                return fn(*args, **kwargs)
+            return FLIGHTS.do(route, request_key(route, *args, **kwargs), fn, *args, **kwargs)
+        return wrapper
+    return deco
@@ -0,0 +1,319 @@
+"""
+Shared read-only snapshot of catalog, lexicons, topic tables and config tables.
+
+One process builds an immutable flat binary file; every uvicorn worker maps it
+read-only, so the pages are shared by the OS page cache instead of being copied
+into each worker's heap. String tables and numeric arrays are read in place
+(zero-copy); only the strings a request actually touches get decoded.
+
+Build (before starting / when catalogs change):
+  python -m app.snapshot build --out /var/lib/brain/snapshot.bin [--catalog cat.json] [--lexicons lex.json]
+Serve:
+  BRAIN_SNAPSHOT=/var/lib/brain/snapshot.bin uvicorn app.main:app --workers 8
+
+Updates are atomic: the builder writes a temp file and os.replace()s it; workers
+notice the new inode and swap their mapping; in-flight readers keep the old one.
+Workers never build: if the file is missing or can't be mapped they log it and
+run on their in-process defaults until a good snapshot shows up.
+"""
+from __future__ import annotations
+import argparse
+import bisect
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Collection, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.settings import get_settings
+
+log = logging.getLogger("uvicorn.error")
+
+MAGIC = b"BRNSNAP1"
+_HEADER = struct.Struct("<8sIIQ")            # magic, n_sections, reserved, build_id
+_ENTRY = struct.Struct("<24sB7xQQ")          # name, kind, offset, length
+KIND_STRS, KIND_F64, KIND_JSON = 1, 2, 3
+
+DEMO_CATALOG_PATH = Path(__file__).resolve().parent / "demo" / "catalog.json"
+CATALOG_FIELDS = ("ppv_asset_id", "title", "description", "media_type", "tags")
+
+
+# ------------------------------ encode ------------------------------
+def _pad8(b: bytes) -> bytes:
+    return b + b"\0" * (-len(b) % 8)
+
+def _enc_strs(items: Sequence[str]) -> bytes:
+    blobs = [s.encode("utf-8") for s in items]
+    offsets = np.zeros(len(blobs) + 1, dtype="<u8")
+    offsets[1:] = np.cumsum([len(b) for b in blobs]) if blobs else []
+    return struct.pack("<II", len(blobs), 0) + offsets.tobytes() + b"".join(blobs)
+
+def _enc_f64(arr: np.ndarray) -> bytes:
+    arr = np.ascontiguousarray(arr, dtype="<f8")
+    return struct.pack("<II", arr.ndim, 0) + np.asarray(arr.shape, dtype="<u8").tobytes() + arr.tobytes()
+
+def encode(sections: Dict[str, Tuple[int, Any]]) -> bytes:
+    """sections: name -> (kind, payload). Returns the full snapshot image."""
+    bodies: List[Tuple[str, int, bytes]] = []
+    for name, (kind, payload) in sections.items():
+        if kind == KIND_STRS:
+            body = _enc_strs(payload)
+        elif kind == KIND_F64:
+            body = _enc_f64(payload)
+        else:
+            body = json.dumps(payload, ensure_ascii=False, sort_keys=True).encode("utf-8")
+        bodies.append((name, kind, body))
+    offset = _HEADER.size + _ENTRY.size * len(bodies)
+    toc, data = [], []
+    for name, kind, body in bodies:
+        toc.append(_ENTRY.pack(name.encode("ascii")[:24], kind, offset, len(body)))
+        data.append(_pad8(body))
+        offset += len(data[-1])
+    payload = b"".join(toc) + b"".join(data)
+    build_id = int.from_bytes(hashlib.blake2b(payload, digest_size=8).digest(), "little")
+    return _HEADER.pack(MAGIC, len(bodies), 0, build_id) + payload
+
+
+def collect_sections(catalog: Optional[List[Dict[str, Any]]] = None,
+                     lexicons: Optional[Dict[str, List[str]]] = None) -> Dict[str, Tuple[int, Any]]:
+    """Gather everything workers would otherwise each hold: catalog, lexicons, topics, configs."""
+    from app.brain import conductor, pricing
+    from app.brain.textfeatures import LEXICONS, TOPICS
+
+    cat = catalog if catalog is not None else json.loads(DEMO_CATALOG_PATH.read_text(encoding="utf-8"))
+    lex = {**LEXICONS, **(lexicons or {})}
+    cfg = get_settings()
+    sections: Dict[str, Tuple[int, Any]] = {
+        "catalog.ppv_asset_id": (KIND_STRS, [c["ppv_asset_id"] for c in cat]),
+        "catalog.title": (KIND_STRS, [c.get("title") or c.get("name", "") for c in cat]),
+        "catalog.description": (KIND_STRS, [c.get("description", "") for c in cat]),
+        "catalog.media_type": (KIND_STRS, [c.get("media_type") or "photo" for c in cat]),
+        "catalog.tags": (KIND_STRS, [",".join(c.get("tags", [])) for c in cat]),
+        "catalog.base_price": (KIND_F64, np.array([float(c["base_price"]) for c in cat])),
+        "topics.pattern": (KIND_STRS, [p for p, _h in TOPICS]),
+        "topics.hint": (KIND_STRS, [h for _p, h in TOPICS]),
+        "config.missions": (KIND_JSON, json.loads(Path(cfg.missions_config or conductor.DEFAULT_MISSIONS_PATH).read_text(encoding="utf-8"))),
+        "config.pricing": (KIND_JSON, json.loads(Path(cfg.pricing_config or pricing.DEFAULT_PRICING_PATH).read_text(encoding="utf-8"))),
+    }
+    for name, words in lex.items():
+        sections[f"lexicon.{name}"] = (KIND_STRS, sorted(set(words)))  # sorted -> bisect lookups
+    return sections
+
+
+def build(out: Path, catalog: Optional[List[Dict[str, Any]]] = None,
+          lexicons: Optional[Dict[str, List[str]]] = None) -> int:
+    """Write the snapshot atomically (temp file + os.replace). Returns the build id."""
+    image = encode(collect_sections(catalog, lexicons))
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(f".{out.name}.{os.getpid()}.tmp")
+    with tmp.open("wb") as fh:
+        fh.write(image)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, out)
+    return _HEADER.unpack_from(image)[3]
+
+
+# ------------------------------ decode ------------------------------
+class StrTable:
+    """Read-only string column over the mapping; decodes one entry per access."""
+    def __init__(self, buf: memoryview):
+        count = struct.unpack_from("<I", buf)[0]
+        self._offsets = np.frombuffer(buf, dtype="<u8", count=count + 1, offset=8)
+        self._blob = buf[8 + 8 * (count + 1):]
+        self._n = count
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __getitem__(self, i: int) -> str:
+        if not -self._n <= i < self._n:
+            raise IndexError(i)
+        i %= self._n
+        return str(self._blob[int(self._offsets[i]):int(self._offsets[i + 1])], "utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        return (self[i] for i in range(self._n))
+
+    def __contains__(self, s: object) -> bool:
+        # lexicon tables are written sorted
+        i = bisect.bisect_left(self, s)  # type: ignore[arg-type]
+        return i < self._n and self[i] == s
+
+
+class Snapshot:
+    def __init__(self, path: Path):
+        self.path = path
+        with path.open("rb") as fh:
+            st = os.fstat(fh.fileno())
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        self.inode = (st.st_dev, st.st_ino)
+        buf = memoryview(self._mm)
+        magic, n, _r, self.build_id = _HEADER.unpack_from(buf)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a brain snapshot")
+        self._sections: Dict[str, Tuple[int, memoryview]] = {}
+        for k in range(n):
+            name, kind, off, length = _ENTRY.unpack_from(buf, _HEADER.size + k * _ENTRY.size)
+            if off + length > len(buf):
+                raise ValueError(f"{path} is truncated")
+            self._sections[name.rstrip(b"\0").decode("ascii")] = (kind, buf[off:off + length])
+        self._cache: Dict[str, Any] = {}
+
+    def names(self) -> List[str]:
+        return list(self._sections)
+
+    def strs(self, name: str) -> StrTable:
+        kind, mv = self._sections[name]
+        assert kind == KIND_STRS, name
+        return StrTable(mv)
+
+    def array(self, name: str) -> np.ndarray:
+        """Zero-copy, read-only float64 view."""
+        kind, mv = self._sections[name]
+        assert kind == KIND_F64, name
+        ndim = struct.unpack_from("<I", mv)[0]
+        shape = tuple(int(d) for d in np.frombuffer(mv, dtype="<u8", count=ndim, offset=8))
+        return np.frombuffer(mv, dtype="<f8", offset=8 + 8 * ndim).reshape(shape)
+
+    def json(self, name: str) -> Any:
+        """Small config tables; decoded once per snapshot version."""
+        if name not in self._cache:
+            kind, mv = self._sections[name]
+            assert kind == KIND_JSON, name
+            self._cache[name] = json.loads(str(mv, "utf-8"))
+        return self._cache[name]
+
+    def has(self, name: str) -> bool:
+        return name in self._sections
+
+    def catalog(self) -> "CatalogColumns":
+        if "catalog" not in self._cache:
+            self._cache["catalog"] = CatalogColumns(self)
+        return self._cache["catalog"]
+
+    def catalog_index(self) -> Dict[str, int]:
+        """ppv_asset_id -> row; decoded once per snapshot version, on first use."""
+        if "catalog_index" not in self._cache:
+            ids = self.strs("catalog.ppv_asset_id")
+            self._cache["catalog_index"] = {a: i for i, a in enumerate(ids)}
+        return self._cache["catalog_index"]
+
+    def catalog_rows(self) -> Iterator[Dict[str, Any]]:
+        cat = self.catalog()
+        return (cat.row(i) for i in range(len(cat)))
+
+
+class CatalogColumns:
+    """
+    The snapshot catalog kept columnar: base_price is the mapped float64 array and
+    rows are decoded one at a time, only when asked for. without() narrows the view
+    to a subset of rows without copying the columns.
+    """
+    def __init__(self, snap: Snapshot, rows: Optional[np.ndarray] = None):
+        self._snap = snap
+        self._cols = {f: snap.strs(f"catalog.{f}") for f in CATALOG_FIELDS}
+        self._rows = rows
+        prices = snap.array("catalog.base_price")
+        self.base_price = prices if rows is None else prices[rows]
+
+    def __len__(self) -> int:
+        return len(self.base_price)
+
+    def _at(self, i: int) -> int:
+        return i if self._rows is None else int(self._rows[i])
+
+    def value(self, field: str, i: int) -> str:
+        return self._cols[field][self._at(i)]
+
+    def row(self, i: int) -> Dict[str, Any]:
+        j = self._at(i)
+        row: Dict[str, Any] = {f: self._cols[f][j] for f in CATALOG_FIELDS}
+        row["tags"] = [t for t in row["tags"].split(",") if t]
+        row["base_price"] = float(self.base_price[i])
+        return row
+
+    def without(self, asset_ids: Collection[str]) -> "CatalogColumns":
+        """The same view minus the rows whose ppv_asset_id is in asset_ids."""
+        index = self._snap.catalog_index()
+        drop = [index[a] for a in asset_ids if a in index]
+        if not drop:
+            return self
+        rows = np.arange(len(self._cols["ppv_asset_id"])) if self._rows is None else self._rows
+        return CatalogColumns(self._snap, rows[~np.isin(rows, drop)])
+
+
+# --------------------------- worker access ---------------------------
+_current: Optional[Snapshot] = None
+_checked_at = 0.0
+_last_error: Optional[str] = None
+_lock = threading.Lock()
+
+def current() -> Optional[Snapshot]:
+    """
+    The mapped snapshot for this worker, or None when BRAIN_SNAPSHOT is unset or
+    nothing usable has been published yet (callers then use their built-in tables).
+    Re-stats the file at most every snapshot_poll_s and swaps to a new inode; a
+    missing or broken replacement keeps the last good mapping.
+    """
+    global _current, _checked_at, _last_error
+    cfg = get_settings()
+    if not cfg.snapshot_path:
+        return None
+    now = time.monotonic()
+    if now - _checked_at < cfg.snapshot_poll_s:
+        return _current
+    with _lock:
+        if now - _checked_at < cfg.snapshot_poll_s:
+            return _current
+        _checked_at = now
+        path = Path(cfg.snapshot_path)
+        try:
+            st = os.stat(path)
+            if _current is None or _current.inode != (st.st_dev, st.st_ino):
+                _current = Snapshot(path)  # old mapping lives on while referenced
+            _last_error = None
+        except (OSError, ValueError, struct.error) as e:
+            err = f"{type(e).__name__}: {e}"
+            if err != _last_error:  # once per distinct problem, not per request
+                _last_error = err
+                log.warning("snapshot %s unavailable (%s); %s", path, err,
+                            "keeping the previous mapping" if _current is not None else "using built-in defaults")
+        return _current
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m app.snapshot")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="build and atomically publish a snapshot")
+    b.add_argument("--out", type=Path, default=None, help="snapshot path (default: $BRAIN_SNAPSHOT)")
+    b.add_argument("--catalog", type=Path, default=None, help="JSON list of catalog items (default: demo catalog)")
+    b.add_argument("--lexicons", type=Path, default=None, help="JSON {name: [words]} merged over the built-ins")
+    i = sub.add_parser("info", help="print sections of a snapshot")
+    i.add_argument("path", type=Path)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "build":
+        out = args.out or (Path(get_settings().snapshot_path) if get_settings().snapshot_path else None)
+        if out is None:
+            ap.error("--out or BRAIN_SNAPSHOT is required")
+        catalog = json.loads(args.catalog.read_text(encoding="utf-8")) if args.catalog else None
+        lexicons = json.loads(args.lexicons.read_text(encoding="utf-8")) if args.lexicons else None
+        build_id = build(out, catalog, lexicons)
+        print(json.dumps({"out": str(out), "build_id": f"{build_id:016x}", "bytes": out.stat().st_size}))
+    else:
+        snap = Snapshot(args.path)
+        print(json.dumps({"build_id": f"{snap.build_id:016x}", "sections": snap.names()}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+from __future__ import annotations
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.brain.contracts import BrainInput, Decision, Signals
+from app.brain.signalizer import derive_signals
+from app.brain.textfeatures import topic_matchers
+
+log = logging.getLogger("uvicorn.error")
+
+# Synthetic traffic pushed through the real ASGI stack at startup, so request
+# parsing, validators, response-model serializers and the regex caches are all
+# built before the worker reports ready.
+_FAN_LINES = [
+    "hey babe 😊 what do you like?",
+    "tomorrow I have a fishing trip tbh",
+    "how much for the video? send pic!",
+]
+
+def _auto_payload(fan_lines: List[str]) -> Dict[str, Any]:
+    return {
+        "messages": {
+            "fan_last": [{"text": t} for t in fan_lines],
+            "creator_last": [{"text": "mmm now I'm curious 😏"}],
+        },
+        "memory": {"storybook": "we joked about tacos yesterday"},
+        "profile": {"fan_id": "warmup", "tier": "gold", "relationship_age_days": 3},
+        "budgets": {"price_floor": 9, "price_ceiling": 120, "price_step": 1.0},
+        "context": {"local_hour": 21, "consecutive_no_reply": 0},
+        "catalog": [],
+    }
+
+def _decide_payload() -> Dict[str, Any]:
+    body = _auto_payload(_FAN_LINES)
+    body["signals"] = Signals(price_intent=0.8, question_density=0.5).model_dump()
+    body["catalog"] = [{"ppv_asset_id": "ppv_warm", "media_type": "photo", "base_price": 12.0,
+                        "description": "warm-up item"}]
+    return body
+
+def _suggest_payload() -> Dict[str, Any]:
+    return {
+        "messages": [{"role": "fan", "text": t} for t in _FAN_LINES] + [{"role": "creator", "text": "hi 😊"}],
+        "profile": {"user_id": "warmup", "tier": "diamond"},
+        "ppv_catalog": [{"ppv_asset_id": "ppv_warm", "title": "warm", "base_price": 15.0, "description": "x"}],
+        "budget": {"price_floor": 9, "price_ceiling": 120},
+    }
+
+WARMUP_CALLS: List[Tuple[str, str, Optional[Dict[str, Any]]]] = [
+    ("GET", "/healthz", None),
+    ("GET", "/demo/auto_payload", None),
+    ("POST", "/decide", _decide_payload()),
+    ("POST", "/auto_decide", _auto_payload(_FAN_LINES[:1])),
+    ("POST", "/auto_decide", _auto_payload(_FAN_LINES)),
+    ("POST", "/suggest?view=admin", _suggest_payload()),
+]
+
+
+class WarmupState:
+    def __init__(self):
+        self.ready = False
+        self.import_ms: Optional[float] = None
+        self.warmup_ms: Optional[float] = None
+        self.steps: Dict[str, float] = {}
+        self.error: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "import_ms": self.import_ms,
+            "warmup_ms": self.warmup_ms,
+            "steps_ms": self.steps,
+            "error": self.error,
+        }
+
+STATE = WarmupState()
+
+
+async def _asgi_call(app, method: str, target: str, body: Optional[Dict[str, Any]]) -> int:
+    path, _, query = target.partition("?")
+    raw = json.dumps(body).encode("utf-8") if body is not None else b""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": query.encode(), "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(raw)).encode())],
+        "client": ("127.0.0.1", 0), "server": ("warmup", 0),
+    }
+    sent = False
+    status = 0
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": raw, "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def run_warmup(app) -> WarmupState:
+    """
+    Pre-build schemas/serializers, compile matchers and run a synthetic decision
+    through every route. Marks STATE.ready only if every call succeeds.
+    """
+    t0 = time.perf_counter()
+    try:
+        t = time.perf_counter()
+        app.openapi()
+        for model in (BrainInput, Decision):
+            model.model_json_schema()
+        STATE.steps["schemas"] = round((time.perf_counter() - t) * 1000.0, 2)
+
+        t = time.perf_counter()
+        derive_signals(BrainInput.model_validate(_auto_payload(_FAN_LINES)).messages.fan_last)
+        for rx, _hint in topic_matchers():
+            rx.search(" ".join(_FAN_LINES))
+        STATE.steps["matchers"] = round((time.perf_counter() - t) * 1000.0, 2)
+
+        t = time.perf_counter()
+        for method, target, body in WARMUP_CALLS:
+            status = await _asgi_call(app, method, target, body)
+            if status != 200:
+                raise RuntimeError(f"warm-up {method} {target} returned {status}")
+        STATE.steps["routes"] = round((time.perf_counter() - t) * 1000.0, 2)
+        STATE.ready = True
+    except Exception as e:  # stay unready; /readyz reports why
+        STATE.error = f"{type(e).__name__}: {e}"
+        log.exception("brain warm-up failed")
+    STATE.warmup_ms = round((time.perf_counter() - t0) * 1000.0, 2)
+    log.info("brain ready=%s import_ms=%s warmup_ms=%s steps=%s",
+             STATE.ready, STATE.import_ms, STATE.warmup_ms, STATE.steps)
+    return STATE
@@ -3,10 +3,11 @@ from .contracts import (
     StrategistInput, StrategistOut, Delivery, ConvoLever, SafetyConstraints,
     SceneCard, PersonaPack, Signals, Shadow, Policy, Priors
 )
-from .service import StrategistService
+from .plancache import PlanCache
+from .service import StrategistService, PlanCancelled
 
 __all__ = [
-    "StrategistService",
+    "StrategistService","PlanCancelled","PlanCache",
     "StrategistInput","StrategistOut","Delivery","ConvoLever","SafetyConstraints",
     "SceneCard","PersonaPack","Signals","Shadow","Policy","Priors"
 ]
@@ -0,0 +1,314 @@
+# brain/strategist/python/config.py
+"""
+Config compiler for brain/strategist/config/*.yaml.
+
+Parses stages / maneuvers / missions / novelty / style_policies, cross-validates
+them against each other and against the StrategistOut contract, and emits one
+compact JSON bundle (integer-indexed missions, levers and goal tokens; priors as
+normalized probability arrays). Services serve from the bundle, never the YAML,
+so a bad config fails at build time instead of mid-conversation; at startup they
+rebuild the in-tree bundle when its source_sha256 no longer matches the YAML
+(ensure_fresh), so an edited config can't be silently ignored either.
+
+Build:
+  python -m brain.strategist.python.config build [--out path/to/bundle.json]
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Literal, Optional, get_args, get_origin
+
+import yaml
+
+from .contracts import ConvoLever, Delivery, SceneCard, StrategistOut
+
+PKG_ROOT = Path(__file__).resolve().parents[1]          # brain/strategist
+CONFIG_DIR = PKG_ROOT / "config"
+DEFAULT_BUNDLE = CONFIG_DIR / "bundle.json"
+SOURCES = ("stages", "maneuvers", "missions", "novelty", "style_policies")
+BUNDLE_VERSION = 1
+
+
+class ConfigError(ValueError):
+    """Raised with every problem found, not just the first."""
+    def __init__(self, problems: List[str]):
+        self.problems = problems
+        super().__init__("invalid strategist config:\n  - " + "\n  - ".join(problems))
+
+
+def _literal(model, field: str) -> List[str]:
+    """Allowed values of a Literal (or Optional[Literal]) contract field."""
+    def flat(tp) -> List[str]:
+        if get_origin(tp) is Literal:
+            return list(get_args(tp))
+        return [v for arg in get_args(tp) for v in flat(arg)]
+    return flat(model.model_fields[field].annotation)
+
+def _bounds(model, field: str) -> tuple:
+    lo = hi = None
+    for m in model.model_fields[field].metadata:
+        lo = getattr(m, "ge", lo)
+        hi = getattr(m, "le", hi)
+    return lo, hi
+
+def _normalize(weights: Dict[str, float], index: List[str]) -> List[float]:
+    vec = [max(0.0, float(weights.get(k, 0.0))) for k in index]
+    total = sum(vec)
+    return [round(v / total, 6) for v in vec] if total > 0 else [0.0] * len(index)
+
+
+def load_sources(config_dir: Path = CONFIG_DIR) -> Dict[str, Any]:
+    out = {}
+    problems = []
+    for name in SOURCES:
+        path = config_dir / f"{name}.yaml"
+        try:
+            out[name] = yaml.safe_load(path.read_text(encoding="utf-8"))
+        except yaml.YAMLError as e:
+            problems.append(f"{name}.yaml: {' '.join(str(e).split())}")
+    if problems:
+        raise ConfigError(problems)
+    return out
+
+
+def compile_bundle(src: Dict[str, Any]) -> Dict[str, Any]:
+    problems: List[str] = []
+
+    contract_missions = _literal(StrategistOut, "mission")
+    contract_levers = _literal(ConvoLever, "type")
+    goal_tokens = _literal(ConvoLever, "goal_token")
+    stage_names = _literal(SceneCard, "relationship_stage")
+
+    # ---- missions.yaml ----
+    missions = src["missions"] or []
+    if len(set(missions)) != len(missions):
+        problems.append("missions.yaml: duplicate missions")
+    for m in missions:
+        if m not in contract_missions:
+            problems.append(f"missions.yaml: {m!r} is not a StrategistOut.mission")
+    m_idx = {m: i for i, m in enumerate(missions)}
+
+    # ---- maneuvers.yaml ----
+    man = src["maneuvers"] or {}
+    levers = man.get("levers") or []
+    for lv in levers:
+        if lv not in contract_levers:
+            problems.append(f"maneuvers.yaml: lever {lv!r} is not in ConvoLever.type")
+    lv_idx = {lv: i for i, lv in enumerate(levers)}
+    gt_idx = {g: i for i, g in enumerate(goal_tokens)}
+    variants: Dict[str, List[Dict[str, Any]]] = {}
+    seen_ids = set()
+    for lv, items in (man.get("variants") or {}).items():
+        if lv not in lv_idx:
+            problems.append(f"maneuvers.yaml: variants for unknown lever {lv!r}")
+        for v in items or []:
+            vid = v.get("id")
+            if not vid or vid in seen_ids:
+                problems.append(f"maneuvers.yaml: missing or duplicate variant id {vid!r}")
+            seen_ids.add(vid)
+            if v.get("goal_token") not in gt_idx:
+                problems.append(f"maneuvers.yaml: {vid}: illegal goal_token {v.get('goal_token')!r}")
+            variants.setdefault(lv, []).append({
+                "id": vid,
+                "goal_token": gt_idx.get(v.get("goal_token"), -1),
+                "text_hint": v.get("text_hint", ""),
+                "shadow_tags": [t for t in str(v.get("shadow_tag", "")).split("|") if t],
+            })
+
+    # ---- style_policies.yaml ----
+    sp = src["style_policies"] or {}
+    paras, mirrors, cadences, asks = (_literal(Delivery, f) for f in ("para", "mirroring", "cadence", "ask_rate"))
+    bub_lo, bub_hi = _bounds(Delivery, "bubbles")
+    emo_lo, emo_hi = _bounds(Delivery, "emoji_budget")
+    for key, allowed in (("cadence_allowed", cadences), ("ask_rate_allowed", asks), ("paragraph_options", paras)):
+        for v in sp.get(key) or []:
+            if v not in allowed:
+                problems.append(f"style_policies.yaml: {key} value {v!r} not allowed by Delivery")
+    emoji_max = sp.get("emoji_budget_max", emo_hi)
+    if not (emo_lo <= emoji_max <= emo_hi):
+        problems.append(f"style_policies.yaml: emoji_budget_max {emoji_max} outside Delivery [{emo_lo},{emo_hi}]")
+    presets: Dict[str, Any] = {}
+    for stage, p in (sp.get("stage_presets") or {}).items():
+        if stage not in stage_names:
+            problems.append(f"style_policies.yaml: unknown stage preset {stage!r}")
+        lo, hi = (p.get("bubble_range") or [bub_lo, bub_hi])
+        if not (bub_lo <= lo <= hi <= bub_hi):
+            problems.append(f"style_policies.yaml: {stage}.bubble_range {[lo, hi]} outside [{bub_lo},{bub_hi}]")
+        elo, ehi = (p.get("emoji_budget") or [0, emoji_max])
+        if not (emo_lo <= elo <= ehi <= emoji_max):
+            problems.append(f"style_policies.yaml: {stage}.emoji_budget {[elo, ehi]} outside [{emo_lo},{emoji_max}]")
+        if p.get("para_default") not in (sp.get("paragraph_options") or paras):
+            problems.append(f"style_policies.yaml: {stage}.para_default {p.get('para_default')!r} not allowed")
+        if p.get("mirroring") not in mirrors:
+            problems.append(f"style_policies.yaml: {stage}.mirroring {p.get('mirroring')!r} not allowed")
+        presets[stage] = {**p, "bubble_range": [lo, hi], "emoji_budget": [elo, ehi]}
+
+    # ---- stages.yaml ----
+    stages_src = {k: v for k, v in (src["stages"] or {}).items() if k != "progression_rules"}
+    stages: Dict[str, Any] = {}
+    for stage, cfg in stages_src.items():
+        if stage not in stage_names:
+            problems.append(f"stages.yaml: unknown stage {stage!r}")
+        for m in (cfg.get("mission_prior") or {}):
+            if m not in m_idx:
+                problems.append(f"stages.yaml: {stage}.mission_prior key {m!r} not in missions.yaml")
+        for lv in (cfg.get("lever_bias") or {}):
+            if lv not in lv_idx:
+                problems.append(f"stages.yaml: {stage}.lever_bias key {lv!r} not in maneuvers.yaml levers")
+        budgets = dict(cfg.get("budgets") or {})
+        for k, v in budgets.items():
+            if k == "ask_rate":
+                if v not in (sp.get("ask_rate_allowed") or asks):
+                    problems.append(f"stages.yaml: {stage}.budgets.ask_rate {v!r} not allowed")
+            elif not (isinstance(v, (int, float)) and 0.0 <= v <= 1.0):
+                problems.append(f"stages.yaml: {stage}.budgets.{k} must be a number in [0, 1]")
+        if stage not in presets:
+            problems.append(f"style_policies.yaml: missing stage preset for {stage!r}")
+        stages[stage] = {
+            "description": cfg.get("description", ""),
+            "mission_prior": _normalize(cfg.get("mission_prior") or {}, missions),
+            "lever_bias": _normalize(cfg.get("lever_bias") or {}, levers),
+            "budgets": budgets,
+        }
+
+    # ---- novelty.yaml ----
+    nov = src["novelty"] or {}
+    for f in nov.get("signature_fields") or []:
+        if f not in StrategistOut.model_fields:
+            problems.append(f"novelty.yaml: signature field {f!r} is not a StrategistOut field")
+    for k in ("signature_window", "angle_ngram_window"):
+        if not (isinstance(nov.get(k), int) and nov[k] > 0):
+            problems.append(f"novelty.yaml: {k} must be a positive integer")
+
+    if problems:
+        raise ConfigError(problems)
+
+    return {
+        "bundle_version": BUNDLE_VERSION,
+        "missions": missions,
+        "levers": levers,
+        "goal_tokens": goal_tokens,
+        "stages": stages,
+        "progression_rules": (src["stages"] or {}).get("progression_rules", {}),
+        "variants": variants,
+        "style": {k: v for k, v in sp.items() if k != "stage_presets"},
+        "stage_presets": presets,
+        "novelty": nov,
+    }
+
+
+def source_digest(src: Dict[str, Any]) -> str:
+    raw = json.dumps(src, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+def build(config_dir: Path = CONFIG_DIR, out: Path = DEFAULT_BUNDLE) -> Dict[str, Any]:
+    src = load_sources(config_dir)
+    bundle = compile_bundle(src)
+    bundle["source_sha256"] = source_digest(src)
+    bundle["built_at"] = int(time.time())
+    tmp = out.with_name(f".{out.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(bundle, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, out)  # readers see the old or the new bundle, never half of one
+    return bundle
+
+
+def ensure_fresh(out: Path = DEFAULT_BUNDLE, config_dir: Path = CONFIG_DIR) -> bool:
+    """
+    Rebuild `out` unless it exists and was compiled from the YAML currently in
+    config_dir (same source_sha256). Returns True if it rebuilt; an invalid YAML
+    raises ConfigError, so a bad edit fails the caller's startup.
+    """
+    digest = source_digest(load_sources(config_dir))
+    try:
+        if json.loads(out.read_text(encoding="utf-8")).get("source_sha256") == digest:
+            return False
+    except (OSError, ValueError):
+        pass  # missing or unreadable: rebuild
+    build(config_dir, out)
+    return True
+
+
+class ConfigBundle:
+    """Loaded bundle with name<->index lookups."""
+    def __init__(self, data: Dict[str, Any]):
+        if data.get("bundle_version") != BUNDLE_VERSION:
+            raise ConfigError([f"bundle_version {data.get('bundle_version')!r} != {BUNDLE_VERSION}"])
+        self.data = data
+        self.missions: List[str] = data["missions"]
+        self.levers: List[str] = data["levers"]
+        self.goal_tokens: List[str] = data["goal_tokens"]
+        self.mission_index = {m: i for i, m in enumerate(self.missions)}
+        self.lever_index = {lv: i for i, lv in enumerate(self.levers)}
+        self.source_sha256: Optional[str] = data.get("source_sha256")
+
+    def mission_prior(self, stage: str) -> Dict[str, float]:
+        vec = self.data["stages"][stage]["mission_prior"]
+        return {m: p for m, p in zip(self.missions, vec) if p > 0}
+
+    def lever_bias(self, stage: str) -> Dict[str, float]:
+        vec = self.data["stages"][stage]["lever_bias"]
+        return {lv: p for lv, p in zip(self.levers, vec) if p > 0}
+
+
+class ConfigBundleLoader:
+    """
+    Holds the current bundle and swaps in a new one when the file's mtime changes
+    (checked at most every poll_s). A bundle that fails to load is ignored and the
+    previous one keeps serving.
+    """
+    def __init__(self, path: Path = DEFAULT_BUNDLE, poll_s: float = 2.0):
+        self.path = Path(path)
+        self.poll_s = poll_s
+        self._lock = threading.Lock()
+        self._checked = 0.0
+        self._mtime = self.path.stat().st_mtime_ns
+        self._bundle = ConfigBundle(json.loads(self.path.read_text(encoding="utf-8")))
+        self.last_error: Optional[str] = None
+
+    def get(self) -> ConfigBundle:
+        now = time.monotonic()
+        if now - self._checked < self.poll_s:
+            return self._bundle
+        with self._lock:
+            self._checked = now
+            try:
+                mtime = self.path.stat().st_mtime_ns
+                if mtime != self._mtime:
+                    self._bundle = ConfigBundle(json.loads(self.path.read_text(encoding="utf-8")))
+                    self._mtime = mtime
+                    self.last_error = None
+            except (OSError, ValueError) as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+        return self._bundle
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m brain.strategist.python.config")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="validate config/*.yaml and write the compiled bundle")
+    b.add_argument("--config-dir", type=Path, default=CONFIG_DIR)
+    b.add_argument("--out", type=Path, default=DEFAULT_BUNDLE)
+    sub.add_parser("check", help="validate only").add_argument("--config-dir", type=Path, default=CONFIG_DIR)
+    args = ap.parse_args(argv)
+    try:
+        if args.cmd == "check":
+            compile_bundle(load_sources(args.config_dir))
+            print("Strategist config: OK")
+        else:
+            bundle = build(args.config_dir, args.out)
+            print(f"Strategist config bundle: {args.out} ({len(bundle['missions'])} missions, "
+                  f"{len(bundle['levers'])} levers, {len(bundle['stages'])} stages)")
+    except ConfigError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
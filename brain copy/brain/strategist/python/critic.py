@@ -0,0 +1,145 @@
+# brain/strategist/python/critic.py
+"""
+Plan critic for best-of-N planning, plus the deterministic fallback plan.
+
+score_plan() returns None for a plan the policy forbids (mission / lever not
+allowed, gating flags dropped, caps above tier budgets) and otherwise a score in
+[0, 1]: prior fit (caller priors + stage prior from the config bundle), lever
+fit, delivery within the stage preset, and novelty against the variety window.
+
+fallback_plan() builds a schema-valid plan from priors and the bundle alone, so
+the planning path always has an answer when every LLM call fails (unless the
+policy allows no contract mission, in which case nothing valid exists).
+"""
+from __future__ import annotations
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from .contracts import ConvoLever, Delivery, SafetyConstraints, StrategistInput, StrategistOut
+
+if TYPE_CHECKING:
+    from .config import ConfigBundle
+
+# score = sum(weight * component); components are each in [0, 1]
+WEIGHTS = {"mission_prior": 0.35, "stage_prior": 0.15, "levers": 0.2, "delivery": 0.1, "novelty": 0.2}
+SAFE_MISSION = "bond"  # fallback tie-break, when the policy allows it
+CAPS = (("jealousy_cap", "jealousy"), ("vulnerability_cap", "vulnerability"), ("intimacy_cap", "intimacy"))
+
+
+def _rel(prior: Dict[str, float], key: str) -> float:
+    """Prior of key relative to the strongest entry (1.0 = the favourite)."""
+    top = max(prior.values(), default=0.0)
+    return prior.get(key, 0.0) / top if top > 0 else 0.5
+
+def violations(plan: StrategistOut, s_in: StrategistInput) -> List[str]:
+    pol = s_in.policy
+    out: List[str] = []
+    if plan.mission not in pol.allowed_missions:
+        out.append(f"mission {plan.mission!r} not allowed")
+    out += [f"lever {lv.type!r} not allowed" for lv in plan.convo_levers if lv.type not in pol.allowed_levers]
+    if pol.gating_flags.get("no_explicit") and not plan.safety_constraints.no_explicit:
+        out.append("no_explicit dropped")
+    if pol.gating_flags.get("respect_boundaries") and not plan.safety_constraints.respect_boundaries:
+        out.append("respect_boundaries dropped")
+    if pol.gating_flags.get("writer_blind_to_price") and not plan.invariants.get("writer_blind_to_price", False):
+        out.append("writer_blind_to_price dropped")
+    for cap, budget in CAPS:
+        if budget in pol.tier_budgets and getattr(plan.safety_constraints, cap) > pol.tier_budgets[budget] + 1e-9:
+            out.append(f"{cap} above tier budget")
+    return out
+
+def score_plan(plan: StrategistOut, s_in: StrategistInput, bundle: ConfigBundle) -> Optional[float]:
+    if violations(plan, s_in):
+        return None
+    stage = s_in.scene_card.relationship_stage
+    stage_known = stage in bundle.data["stages"]
+    parts = {
+        "mission_prior": _rel(s_in.priors.mission_prior, plan.mission),
+        "stage_prior": _rel(bundle.mission_prior(stage), plan.mission) if stage_known else 0.5,
+        "levers": 0.5,
+        "delivery": 1.0,
+        "novelty": 0.0 if plan.novelty_signature in s_in.variety_window_signatures else 1.0,
+    }
+    if plan.convo_levers:
+        bias = {**(bundle.lever_bias(stage) if stage_known else {}), **s_in.priors.maneuver_prior}
+        parts["levers"] = sum(_rel(bias, lv.type) for lv in plan.convo_levers) / len(plan.convo_levers)
+    preset = bundle.data["stage_presets"].get(stage) if stage else None
+    if preset:
+        lo, hi = preset["bubble_range"]
+        elo, ehi = preset["emoji_budget"]
+        parts["delivery"] = 0.5 * (lo <= plan.delivery.bubbles <= hi) + 0.5 * (elo <= plan.delivery.emoji_budget <= ehi)
+    # theme tags already spent in the window count against novelty too
+    window_tags = {t for sig in s_in.variety_window_signatures for t in sig.split(":")}
+    if plan.theme_tags and parts["novelty"]:
+        parts["novelty"] *= 1.0 - 0.5 * len(window_tags.intersection(plan.theme_tags)) / len(plan.theme_tags)
+    return round(sum(WEIGHTS[k] * v for k, v in parts.items()), 4)
+
+
+def fallback_plan(s_in: StrategistInput, bundle: ConfigBundle, reason: str = "") -> StrategistOut:
+    """
+    Deterministic, policy-respecting plan from priors + config. Only ever picks what
+    the policy allows; raises ValueError when the policy allows no contract mission,
+    since then no valid plan exists at all.
+    """
+    from .config import _literal  # lazy, like the service: keeps `-m ...config` clean
+    pol = s_in.policy
+    stage = s_in.scene_card.relationship_stage
+    stage_known = stage in bundle.data["stages"]
+    contract_missions = _literal(StrategistOut, "mission")
+    allowed = [m for m in pol.allowed_missions if m in contract_missions]
+    if not allowed:
+        raise ValueError(f"policy allows no StrategistOut mission: {pol.allowed_missions!r}")
+    prior = {**(bundle.mission_prior(stage) if stage_known else {}), **s_in.priors.mission_prior}
+    mission = max(allowed, key=lambda m: (prior.get(m, 0.0), m == SAFE_MISSION))
+
+    lever_types = _literal(ConvoLever, "type")
+    bias = {**(bundle.lever_bias(stage) if stage_known else {}), **s_in.priors.maneuver_prior}
+    levers: List[ConvoLever] = []
+    ok_levers = [lv for lv in pol.allowed_levers if lv in lever_types]
+    if ok_levers:
+        lever = max(ok_levers, key=lambda lv: bias.get(lv, 0.0))
+        variant = (bundle.data["variants"].get(lever) or [{}])[0]
+        gt = variant.get("goal_token", -1)
+        levers.append(ConvoLever(
+            type=lever,
+            text=variant.get("text_hint") or "keep it light and ask one easy question",
+            goal_token=bundle.goal_tokens[gt] if 0 <= gt < len(bundle.goal_tokens) else "reply_token",
+        ))
+
+    preset = (bundle.data["stage_presets"].get(stage) if stage else None) or {}
+    emoji_hi = (preset.get("emoji_budget") or [0, 1])[1]
+    delivery = Delivery(
+        bubbles=(preset.get("bubble_range") or [1, 1])[0],
+        para=preset.get("para_default", "short"),
+        mirroring=preset.get("mirroring", "med"),
+        emoji_budget=min(1, emoji_hi),
+        cadence="steady",
+        ask_rate=(bundle.data["stages"][stage]["budgets"].get("ask_rate", "low") if stage_known else "low"),
+    )
+    budgets = pol.tier_budgets
+    safety = SafetyConstraints(
+        no_explicit=True, respect_boundaries=True,
+        jealousy_cap=min(0.2, budgets.get("jealousy", 0.2)),
+        vulnerability_cap=min(0.3, budgets.get("vulnerability", 0.3)),
+        intimacy_cap=min(0.3, budgets.get("intimacy", 0.3)),
+    )
+    topics = list(s_in.scene_card.topics_snapshot[:2]) or ["how their day is going"]
+    signature = f"{mission}:fallback:t{s_in.turn}"
+    n = 0
+    while signature in s_in.variety_window_signatures:
+        n += 1
+        signature = f"{mission}:fallback:t{s_in.turn}.{n}"
+    return StrategistOut(
+        mission=mission,
+        angle=f"easy, warm follow-up on {topics[0]}",
+        talk_about=topics,
+        theme_tags=["fallback", mission],
+        delivery=delivery,
+        convo_levers=levers,
+        sell_intent=False,
+        shadow_hints=[],
+        safety_constraints=safety,
+        novelty_signature=signature,
+        guaranteed_tokens=[lv.goal_token for lv in levers],  # nothing promised without a lever
+        invariants={"writer_blind_to_price": True, "no_time_promises": True},
+        why=f"fallback plan ({reason})" if reason else "fallback plan",
+    )
@@ -0,0 +1,138 @@
+# brain/strategist/python/plancache.py
+"""
+Content-addressed cache of strategist plans.
+
+Key = hash of the prompt-relevant StrategistInput fields (everything but thread_id
+and turn), with floats snapped to buckets so near-identical quiet threads share a
+plan, plus a salt for the prompts and config bundle in use. Entries expire after
+ttl_s and the table is LRU-bounded. A cached plan whose novelty_signature is in
+the caller's variety_window_signatures is never returned.
+
+With `path`, puts are appended to a JSONL log that is compacted and replayed on
+start (and again whenever it grows past twice the table), so a restarted
+service begins warm.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from .contracts import StrategistInput, StrategistOut
+
+# bucket width per float field name; anything not listed uses `quantum`
+FIELD_QUANTA = {"avg_chars": 20.0}
+
+
+def _snap(v: float, q: float) -> float:
+    return round(round(v / q) * q, 6)
+
+def _quantize(obj: Any, quantum: float, name: str = "") -> Any:
+    if isinstance(obj, bool) or obj is None:
+        return obj
+    if isinstance(obj, float):
+        return _snap(obj, FIELD_QUANTA.get(name, quantum))
+    if isinstance(obj, dict):
+        return {k: _quantize(v, quantum, k) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_quantize(v, quantum, name) for v in obj]
+    return obj
+
+
+class PlanCache:
+    def __init__(self, max_entries: int = 4096, ttl_s: float = 900.0, quantum: float = 0.1,
+                 path: Optional[Path] = None):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.quantum = quantum
+        self.path = Path(path) if path else None
+        self._lock = threading.Lock()
+        self._d: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.window_skips = 0
+        self._log_lines = 0
+        if self.path is not None:
+            self._replay()
+
+    # ---- keys ----
+    def key(self, s_in: StrategistInput, salt: str = "") -> str:
+        fields = s_in.model_dump(mode="json", exclude={"thread_id", "turn"})
+        fields["variety_window_signatures"] = sorted(set(fields["variety_window_signatures"]))
+        body = json.dumps([salt, _quantize(fields, self.quantum)], sort_keys=True,
+                          separators=(",", ":"), ensure_ascii=False)
+        return hashlib.blake2b(body.encode("utf-8"), digest_size=16).hexdigest()
+
+    # ---- lookups ----
+    def get(self, key: str, variety_window: Iterable[str] = ()) -> Optional[StrategistOut]:
+        now = time.time()
+        with self._lock:
+            entry = self._d.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._d[key]
+                self.misses += 1
+                return None
+            if entry[1].get("novelty_signature") in set(variety_window):
+                self.window_skips += 1
+                self.misses += 1
+                return None
+            self._d.move_to_end(key)
+            self.hits += 1
+            plan = entry[1]
+        return StrategistOut.model_validate(plan)  # fresh object per caller
+
+    def put(self, key: str, plan: StrategistOut) -> None:
+        expires = time.time() + self.ttl_s
+        data = plan.model_dump(mode="json")
+        with self._lock:
+            self._insert(key, expires, data)
+            if self.path is not None:
+                with self.path.open("a", encoding="utf-8") as fh:
+                    fh.write(json.dumps({"k": key, "exp": expires, "plan": data}, ensure_ascii=False) + "\n")
+                self._log_lines += 1
+                if self._log_lines > 2 * self.max_entries:
+                    self._compact()
+
+    def _insert(self, key: str, expires: float, data: Dict[str, Any]) -> None:
+        self._d[key] = (expires, data)
+        self._d.move_to_end(key)
+        while len(self._d) > self.max_entries:
+            self._d.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"size": len(self._d), "max_entries": self.max_entries, "hits": self.hits,
+                    "misses": self.misses, "window_skips": self.window_skips}
+
+    # ---- persistence ----
+    def _replay(self) -> None:
+        """Load the log (skipping expired / corrupt lines), then rewrite it compacted."""
+        assert self.path is not None
+        now = time.time()
+        if self.path.exists():
+            with self.path.open(encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        rec = json.loads(line)
+                        if rec["exp"] > now:
+                            self._insert(rec["k"], float(rec["exp"]), rec["plan"])
+                    except (ValueError, KeyError, TypeError):
+                        continue  # torn last line after a crash
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._compact()
+
+    def _compact(self) -> None:
+        assert self.path is not None
+        now = time.time()
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        live = [(k, exp, plan) for k, (exp, plan) in self._d.items() if exp > now]
+        with tmp.open("w", encoding="utf-8") as fh:
+            for k, exp, plan in live:
+                fh.write(json.dumps({"k": k, "exp": exp, "plan": plan}, ensure_ascii=False) + "\n")
+        os.replace(tmp, self.path)
+        self._log_lines = len(live)
@@ -1,13 +1,30 @@
 # brain/strategist/python/service.py
 from __future__ import annotations
+import hashlib
 import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
 from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional
 from pydantic import ValidationError
 from .contracts import StrategistInput, StrategistOut
+from .critic import fallback_plan, score_plan
+from .plancache import PlanCache
+
+if TYPE_CHECKING:
+    from .config import ConfigBundle
+
+_CANCEL_POLL_S = 0.02
+
+class PlanCancelled(RuntimeError):
+    """The turn was superseded before the strategist LLM call finished."""
 
 class StrategistService:
     """Build user prompt, call LLM, validate StrategistOut."""
-    def __init__(self, root: str):
+    def __init__(self, root: str, bundle_path: Optional[str] = None, bundle_poll_s: float = 2.0,
+                 plan_cache: Optional[PlanCache] = None, best_of_n: int = 3, accept_score: float = 0.75,
+                 best_of_timeout_s: float = 8.0, concurrent_turns: int = 8):
         # Anchor prompts/contracts to THIS package (no external path guessing)
         pkg_root = Path(__file__).resolve().parents[1]  # brain/strategist
         prom_dir = pkg_root / "prompts"
@@ -22,6 +39,50 @@ class StrategistService:
         self.in_schema = json.loads((contracts_dir / "strategist_in.schema.json").read_text(encoding="utf-8"))
         self.out_schema = json.loads((contracts_dir / "strategist_out.schema.json").read_text(encoding="utf-8"))
 
+        # Compiled config bundle (see python/config.py). The in-tree bundle is rebuilt
+        # whenever config/*.yaml changed since it was compiled, so an invalid config
+        # fails here, at startup, not mid-conversation. An explicit bundle_path is a
+        # deploy artifact: used as is, built only when missing.
+        from .config import DEFAULT_BUNDLE, ConfigBundleLoader, build as build_config, ensure_fresh
+        bundle = Path(bundle_path) if bundle_path else DEFAULT_BUNDLE
+        if bundle_path is None:
+            ensure_fresh(bundle)
+        elif not bundle.exists():
+            build_config(out=bundle)
+        self._config = ConfigBundleLoader(bundle, poll_s=bundle_poll_s)
+
+        # Optional plan cache (see python/plancache.py); keys are salted with the prompts
+        # and the config bundle so editing either never serves a stale plan.
+        self.plan_cache = plan_cache
+        self._prompt_digest = hashlib.sha256((self.system_prompt + "\0" + self.user_template).encode("utf-8")).hexdigest()
+
+        # Best-of-N planning (plan_best_of): N concurrent calls, early accept at accept_score,
+        # fallback plan once best_of_timeout_s passes
+        self.best_of_n = best_of_n
+        self.accept_score = accept_score
+        self.best_of_timeout_s = best_of_timeout_s
+        self.best_of_stats: Dict[str, int] = {"turns": 0, "early_accepts": 0, "invalid": 0, "fallbacks": 0}
+        self._stats_lock = threading.Lock()
+
+        # LLM calls run on this service's pool when they may be abandoned (cancellable
+        # turns, best-of-N). Abandoned calls keep their thread until they return, so
+        # size it for every call of concurrent_turns best-of-N turns at once.
+        self._llm_pool = ThreadPoolExecutor(max_workers=max(1, best_of_n) * max(1, concurrent_turns),
+                                            thread_name_prefix="strategist-llm")
+
+    def close(self) -> None:
+        """Drop queued LLM calls and release the pool (running calls finish in the background)."""
+        self._llm_pool.shutdown(wait=False, cancel_futures=True)
+
+    def _count(self, stat: str, k: int = 1) -> None:
+        with self._stats_lock:
+            self.best_of_stats[stat] += k
+
+    @property
+    def config(self) -> ConfigBundle:
+        """Current config bundle; hot-swapped when the bundle file changes."""
+        return self._config.get()
+
     def build_user_prompt(self, s_in: StrategistInput) -> str:
         payload = {
             "thread_id": s_in.thread_id,
@@ -37,15 +98,130 @@ class StrategistService:
         }
         return self.user_template.replace("{{INPUT_JSON}}", json.dumps(payload, ensure_ascii=False))
 
-    def plan(self, s_in: StrategistInput, llm_call) -> StrategistOut:
+    def _cache_salt(self) -> str:
+        return f"{self._prompt_digest}:{self.config.data.get('source_sha256', '')}"
+
+    def _call_llm(self, llm_call, user_prompt: str, cancel: Optional[threading.Event]) -> str:
+        if cancel is None:
+            return llm_call(self.system_prompt, user_prompt)
+        if cancel.is_set():
+            raise PlanCancelled("cancelled before the LLM call")
+        fut = self._llm_pool.submit(llm_call, self.system_prompt, user_prompt)
+        while True:
+            try:
+                return fut.result(timeout=_CANCEL_POLL_S)
+            except FutureTimeout:
+                if cancel.is_set():
+                    fut.cancel()  # no-op if already running; its result is dropped
+                    raise PlanCancelled("cancelled during the LLM call")
+
+    def plan(self, s_in: StrategistInput, llm_call, cancel: Optional[threading.Event] = None) -> StrategistOut:
+        """
+        One strategist turn. `cancel` (e.g. the app's debounce cancel_event()) abandons
+        the in-flight LLM call with PlanCancelled as soon as it is set. With a plan
+        cache, a fresh plan for an equivalent input is reused unless its
+        novelty_signature is in the variety window.
+        """
+        key = None
+        if self.plan_cache is not None:
+            key = self.plan_cache.key(s_in, self._cache_salt())
+            hit = self.plan_cache.get(key, s_in.variety_window_signatures)
+            if hit is not None:
+                return hit
         user_prompt = self.build_user_prompt(s_in)
-        raw = llm_call(self.system_prompt, user_prompt)
+        out = self._parse(self._call_llm(llm_call, user_prompt, cancel))
+        if key is not None:
+            self.plan_cache.put(key, out)
+        return out
+
+    def plan_best_of(self, s_in: StrategistInput, llm_call, n: Optional[int] = None,
+                     accept_score: Optional[float] = None, timeout_s: Optional[float] = None,
+                     cancel: Optional[threading.Event] = None) -> StrategistOut:
+        """
+        Best-of-N turn: fire n calls concurrently, each with flatter mission priors and
+        more exploration than the last, validate and critic-score plans as they arrive,
+        and return the first that reaches accept_score (the rest are cancelled), else
+        the best valid one. If none is valid, or timeout_s (default best_of_timeout_s)
+        passes with none, returns the deterministic fallback plan; only `cancel` (or a
+        policy that allows no contract mission, ValueError) makes this raise.
+        """
+        n = max(1, n or self.best_of_n)
+        accept = self.accept_score if accept_score is None else accept_score
+        timeout_s = self.best_of_timeout_s if timeout_s is None else timeout_s
+        bundle = self.config
+        self._count("turns")
+        key = None
+        if self.plan_cache is not None:
+            key = self.plan_cache.key(s_in, self._cache_salt())
+            hit = self.plan_cache.get(key, s_in.variety_window_signatures)
+            if hit is not None:
+                return hit
+        if cancel is not None and cancel.is_set():
+            raise PlanCancelled("cancelled before the LLM call")
+
+        pending = {self._llm_pool.submit(llm_call, self.system_prompt, self.build_user_prompt(v))
+                   for v in _explore_variants(s_in, n)}
+        deadline = time.monotonic() + timeout_s
+        best: Optional[StrategistOut] = None
+        best_score = -1.0
+        problems: List[str] = []
+        try:
+            while pending:
+                done, pending = wait(pending, timeout=_CANCEL_POLL_S, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    try:
+                        plan = self._parse(fut.result())
+                    except Exception as e:  # LLM transport error, bad JSON or schema
+                        problems.append(str(e)[:200])
+                        continue
+                    score = score_plan(plan, s_in, bundle)
+                    if score is None:
+                        problems.append(f"policy violation in {plan.mission!r} plan")
+                        continue
+                    if score > best_score:
+                        best, best_score = plan, score
+                if best is not None and best_score >= accept:
+                    self._count("early_accepts")
+                    break
+                if cancel is not None and cancel.is_set():
+                    raise PlanCancelled("cancelled during best-of-N")
+                if time.monotonic() > deadline:
+                    problems.append(f"timeout after {timeout_s}s")
+                    break
+        finally:
+            for fut in pending:
+                fut.cancel()  # queued calls never start; running ones are dropped
+
+        self._count("invalid", sum(1 for p in problems if not p.startswith("timeout")))
+        if best is None:
+            self._count("fallbacks")
+            return fallback_plan(s_in, bundle, reason="; ".join(problems)[:300] or "no plan")
+        if key is not None:
+            self.plan_cache.put(key, best)
+        return best
+
+    def _parse(self, raw: str) -> StrategistOut:
         try:
             data = json.loads(raw)
         except json.JSONDecodeError as e:
             raise RuntimeError(f"Strategist JSON parse error: {e}\nRaw: {raw[:400]}")
         try:
-            out = StrategistOut.model_validate(data)
+            return StrategistOut.model_validate(data)
         except ValidationError as ve:
             raise RuntimeError(f"Strategist schema validation failed: {ve}")
-        return out
+
+
+def _explore_variants(s_in: StrategistInput, n: int) -> List[StrategistInput]:
+    """s_in itself, then copies with tempered mission priors and raised exploration."""
+    out = [s_in]
+    prior = s_in.priors.mission_prior
+    for i in range(1, n):
+        temp = 1.0 + 0.75 * i
+        flat = {m: max(p, 0.0) ** (1.0 / temp) for m, p in prior.items()}
+        total = sum(flat.values()) or 1.0
+        priors = s_in.priors.model_copy(update={
+            "mission_prior": {m: round(p / total, 4) for m, p in flat.items()},
+            "exploration": min(1.0, s_in.priors.exploration + 0.15 * i),
+        })
+        out.append(s_in.model_copy(update={"priors": priors}))
+    return out